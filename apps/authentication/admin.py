@@ -1,8 +1,61 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .models import User, UserSession, SecurityLog
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses the PostgreSQL row estimate for unfiltered tables."""
+    
+    # Below this many rows an exact COUNT(*) is cheap enough to keep.
+    exact_count_threshold = 10000
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return super().count
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        
+        estimate = row[0] if row else -1
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+
+class EstimatedCountAdminMixin:
+    """Avoid full-table COUNT(*) queries on large append-only changelists."""
+    
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SecurityEventTypeFilter(admin.SimpleListFilter):
+    """Event type filter built from the static choices, never from the table."""
+    
+    title = 'event type'
+    parameter_name = 'event_type'
+    event_types = dict(SecurityLog.EVENT_TYPES)
+    
+    def lookups(self, request, model_admin):
+        return SecurityLog.EVENT_TYPES
+    
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value in self.event_types:
+            return queryset.filter(event_type=value)
+        return queryset
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'username', 'totp_enabled', 'failed_login_attempts', 'is_active')
@@ -17,7 +70,7 @@ class UserAdmin(BaseUserAdmin):
         ('Security', {
             'fields': (
                 'master_password_hash', 'master_password_salt', 'encryption_key',
-                'totp_secret', 'totp_enabled', 'backup_codes',
+                'totp_secret', 'totp_enabled',
                 'last_password_change', 'failed_login_attempts', 'locked_until'
             )
         }),
@@ -34,7 +87,7 @@ class UserAdmin(BaseUserAdmin):
     
     readonly_fields = (
         'master_password_hash', 'master_password_salt', 'encryption_key',
-        'totp_secret', 'backup_codes', 'last_password_change',
+        'totp_secret', 'last_password_change',
         'failed_login_attempts', 'locked_until'
     )
 
@@ -44,16 +97,28 @@ class UserSessionAdmin(admin.ModelAdmin):
     list_display = ('user', 'ip_address', 'created_at', 'last_activity', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('user__email', 'ip_address')
+    list_select_related = ('user',)
     readonly_fields = ('session_key', 'user_agent', 'created_at', 'last_activity')
 
 
 @admin.register(SecurityLog)
-class SecurityLogAdmin(admin.ModelAdmin):
+class SecurityLogAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'event_type', 'ip_address', 'timestamp')
-    list_filter = ('event_type', 'timestamp')
+    list_filter = (SecurityEventTypeFilter, 'timestamp')
     search_fields = ('user__email', 'description')
+    list_select_related = ('user',)
     readonly_fields = ('user', 'event_type', 'ip_address', 'user_agent', 'description', 'timestamp')
     
+    # Columns loaded for the changelist; skips the wide user_agent/description text
+    changelist_fields = ('id', 'user__email', 'event_type', 'ip_address', 'timestamp')
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name == 'authentication_securitylog_changelist':
+            queryset = queryset.only(*self.changelist_fields)
+        return queryset
+    
     def has_add_permission(self, request):
         return False
     
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Seconds an authenticated user stays cached between requests
+USER_CACHE_TIMEOUT = 60
+
+# Columns kept in the cache. The password and master password hashes, the
+# encryption key and the TOTP secret are left deferred, so they never reach
+# the cache and are read from the database by the views that use them.
+CACHED_USER_FIELDS = ('id', 'email', 'totp_enabled', 'is_active')
+
+
+def cached_user_key(user_id) -> str:
+    """Cache key for the user loaded by CachedJWTAuthentication."""
+    return f'auth_user:{user_id}'
+
+
+def forget_cached_user(user_id) -> None:
+    """Drop a cached user so the next request reloads it."""
+    cache.delete(cached_user_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that caches the token's user instead of loading it on every request."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = cached_user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = self.user_model.objects.only(*CACHED_USER_FIELDS).filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).first()
+            if user is None or not user.is_active or api_settings.CHECK_REVOKE_TOKEN:
+                # simplejwt raises the usual errors; revocation checks need
+                # the password hash, so those users are not cached.
+                return super().get_user(validated_token)
+            # Saving or deleting a user evicts the entry (see signals)
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,27 @@
+from .models import SecurityLog
+
+
+class SecurityLogBufferMiddleware:
+    """Collect security log entries for a request and insert them in one query."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._security_log_buffer = []
+        try:
+            return self.get_response(request)
+        finally:
+            buffer = request._security_log_buffer
+            if buffer:
+                SecurityLog.objects.bulk_create(buffer)
+
+
+def record_security_log(request, **fields) -> None:
+    """Queue a security log entry on the request, or save it if there is no buffer."""
+    log = SecurityLog(**fields)
+    buffer = getattr(request, '_security_log_buffer', None)
+    if buffer is None:
+        log.save()
+    else:
+        buffer.append(log)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="securitylog",
+            name="auth_securi_user_id_3ff7bf_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="usersession",
+            name="auth_sessio_user_id_1efbb7_idx",
+        ),
+        migrations.AddIndex(
+            model_name="securitylog",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="seclog_user_ts_desc_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="securitylog",
+            index=models.Index(
+                condition=models.Q(("event_type", "failed_login")),
+                fields=["user", "timestamp"],
+                name="seclog_failed_login_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usersession",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user"],
+                name="auth_sessions_user_active_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+# Same key salt as apps.authentication.models.BACKUP_CODE_KEY_SALT
+BACKUP_CODE_KEY_SALT = "apps.authentication.models.BackupCode"
+
+
+def copy_backup_codes(apps, schema_editor):
+    """Move plaintext JSON backup codes into the keyed-hash BackupCode table."""
+    User = apps.get_model("authentication", "User")
+    BackupCode = apps.get_model("authentication", "BackupCode")
+    codes = []
+    for user_id, backup_codes in User.objects.values_list("id", "backup_codes"):
+        for code in backup_codes or []:
+            codes.append(
+                BackupCode(
+                    user_id=user_id,
+                    code_hash=salted_hmac(
+                        BACKUP_CODE_KEY_SALT, code, algorithm="sha256"
+                    ).hexdigest(),
+                )
+            )
+    BackupCode.objects.bulk_create(codes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0002_security_log_session_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BackupCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code_hash", models.CharField(max_length=64)),
+                ("used", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="backup_code_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "auth_backup_codes",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("used", False)),
+                        fields=["user"],
+                        name="auth_backup_codes_unused_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_backup_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="user",
+            name="backup_codes",
+        ),
+    ]
@@ -1,11 +1,18 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from typing import List, Optional
-import secrets
+import hmac
+import os
+import time
 import pyotp
 
 
+# Key salt for BackupCode.hash_code; the data migration in 0003 uses it too
+BACKUP_CODE_KEY_SALT = 'apps.authentication.models.BackupCode'
+
+
 class User(AbstractUser):
     """Custom user model with enhanced security features."""
     
@@ -17,7 +24,6 @@ class User(AbstractUser):
     # 2FA settings
     totp_secret = models.CharField(max_length=32, blank=True, null=True)
     totp_enabled = models.BooleanField(default=False)
-    backup_codes = models.JSONField(default=list, blank=True)
     
     # Security settings
     last_password_change = models.DateTimeField(default=timezone.now)
@@ -28,6 +34,10 @@ class User(AbstractUser):
     password_generator_length = models.IntegerField(default=16)
     password_generator_symbols = models.BooleanField(default=True)
     
+    # Account lockout policy
+    MAX_FAILED_LOGIN_ATTEMPTS = 5
+    LOCKOUT_DURATION = timezone.timedelta(minutes=30)
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     
@@ -46,34 +56,77 @@ class User(AbstractUser):
         self.totp_secret = pyotp.random_base32()
         return self.totp_secret
     
+    def get_totp(self) -> Optional[pyotp.TOTP]:
+        """Get TOTP generator for the current secret."""
+        if not self.totp_secret:
+            return None
+        return pyotp.totp.TOTP(self.totp_secret)
+    
     def get_totp_uri(self) -> Optional[str]:
         """Get TOTP URI for QR code generation."""
-        if not self.totp_secret:
+        totp = self.get_totp()
+        if totp is None:
             return None
-        return pyotp.totp.TOTP(self.totp_secret).provisioning_uri(
+        return totp.provisioning_uri(
             name=self.email,
             issuer_name="Password Manager"
         )
     
-    def verify_totp(self, token: str) -> bool:
-        """Verify TOTP token."""
-        if not self.totp_secret or not self.totp_enabled:
+    def verify_totp(self, token: str, window: int = 1) -> bool:
+        """Verify TOTP token, accepting codes up to `window` steps away."""
+        # Only a secret is required: verify_2fa_setup checks a code before
+        # 2FA is enabled, and login_view checks totp_enabled itself.
+        if not self.totp_secret:
             return False
-        return pyotp.totp.TOTP(self.totp_secret).verify(token)
+        
+        totp = self.get_totp()
+        now = time.time()
+        candidate = str(token).encode('utf-8')
+        # Check every step in the window, without returning early, so the
+        # time taken does not depend on whether or where the code matched.
+        matched = False
+        for offset in range(-window, window + 1):
+            expected = totp.at(now, counter_offset=offset).encode('utf-8')
+            matched |= hmac.compare_digest(expected, candidate)
+        return matched
+    
+    @staticmethod
+    def new_backup_codes() -> List[str]:
+        """Create 10 backup codes without saving them."""
+        # One CSPRNG draw for all codes, split into 4-byte hex chunks
+        raw = os.urandom(40)
+        return [raw[i:i + 4].hex() for i in range(0, 40, 4)]
     
     def generate_backup_codes(self) -> List[str]:
-        """Generate 10 backup codes."""
-        self.backup_codes = [secrets.token_hex(4) for _ in range(10)]
-        self.save()
-        return self.backup_codes
+        """Generate 10 backup codes, replacing any existing ones."""
+        codes = self.new_backup_codes()
+        with transaction.atomic():
+            self.clear_backup_codes()
+            BackupCode.objects.bulk_create([
+                BackupCode(user=self, code_hash=BackupCode.hash_code(code))
+                for code in codes
+            ])
+        return codes
+    
+    def clear_backup_codes(self) -> None:
+        """Delete all backup codes."""
+        self.backup_code_entries.all().delete()
     
     def use_backup_code(self, code: str) -> bool:
-        """Use and remove a backup code."""
-        if code in self.backup_codes:
-            self.backup_codes.remove(code)
-            self.save()
-            return True
-        return False
+        """Use and invalidate a backup code."""
+        candidate = BackupCode.hash_code(code).encode('ascii')
+        # Compare against every unused code in constant time so the
+        # response time does not leak how much of a code matched.
+        match_id = None
+        for code_id, code_hash in self.backup_code_entries.filter(used=False).values_list('id', 'code_hash'):
+            if hmac.compare_digest(code_hash.encode('ascii'), candidate):
+                match_id = code_id
+        
+        if match_id is None:
+            return False
+        
+        # The used=False guard makes concurrent use of one code succeed once
+        return BackupCode.objects.filter(pk=match_id, used=False).update(used=True) == 1
     
     def is_account_locked(self) -> bool:
         """Check if account is locked due to failed attempts."""
@@ -83,16 +136,56 @@ class User(AbstractUser):
     
     def increment_failed_login(self) -> None:
         """Increment failed login attempts and lock if necessary."""
-        self.failed_login_attempts += 1
-        if self.failed_login_attempts >= 5:
-            self.locked_until = timezone.now() + timezone.timedelta(minutes=30)
-        self.save()
+        # Increment and lock in one UPDATE so concurrent failures are not
+        # lost; the CASE sees the pre-update counter.
+        User.objects.filter(pk=self.pk).update(
+            failed_login_attempts=models.F('failed_login_attempts') + 1,
+            locked_until=models.Case(
+                models.When(
+                    failed_login_attempts__gte=self.MAX_FAILED_LOGIN_ATTEMPTS - 1,
+                    then=models.Value(timezone.now() + self.LOCKOUT_DURATION)
+                ),
+                default=models.F('locked_until')
+            )
+        )
+        self.refresh_from_db(fields=['failed_login_attempts', 'locked_until'])
     
     def reset_failed_login(self) -> None:
         """Reset failed login attempts on successful login."""
+        if not self.failed_login_attempts and self.locked_until is None:
+            return
         self.failed_login_attempts = 0
         self.locked_until = None
-        self.save()
+        self.save(update_fields=['failed_login_attempts', 'locked_until'])
+
+
+class BackupCode(models.Model):
+    """Single-use 2FA backup code, stored as an HMAC keyed by SECRET_KEY."""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='backup_code_entries')
+    code_hash = models.CharField(max_length=64)
+    used = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'auth_backup_codes'
+        indexes = [
+            models.Index(
+                fields=['user'],
+                condition=models.Q(used=False),
+                name='auth_backup_codes_unused_idx',
+            ),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.user.email} - {'used' if self.used else 'unused'}"
+    
+    @staticmethod
+    def hash_code(code: str) -> str:
+        """Hash a plaintext backup code for storage and lookup."""
+        # Keyed, so a leaked table cannot be brute-forced over the small
+        # code space without the server secret as well
+        return salted_hmac(BACKUP_CODE_KEY_SALT, code, algorithm='sha256').hexdigest()
 
 
 class UserSession(models.Model):
@@ -109,7 +202,11 @@ class UserSession(models.Model):
     class Meta:
         db_table = 'auth_sessions'
         indexes = [
-            models.Index(fields=['user', 'is_active']),
+            models.Index(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='auth_sessions_user_active_idx',
+            ),
             models.Index(fields=['session_key']),
             models.Index(fields=['last_activity']),
         ]
@@ -143,7 +240,12 @@ class SecurityLog(models.Model):
     class Meta:
         db_table = 'auth_security_logs'
         indexes = [
-            models.Index(fields=['user', 'timestamp']),
+            models.Index(fields=['user', '-timestamp'], name='seclog_user_ts_desc_idx'),
+            models.Index(
+                fields=['user', 'timestamp'],
+                condition=models.Q(event_type='failed_login'),
+                name='seclog_failed_login_idx',
+            ),
             models.Index(fields=['event_type']),
             models.Index(fields=['timestamp']),
         ]
@@ -1,12 +1,92 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+import base64
 import secrets
 import hashlib
+import hmac
 import os
 
 
+# Algorithm prefix of master_password_hash values, as in Django's hashers
+MASTER_PASSWORD_ALGORITHM = 'scrypt'
+
+# Values written before the scrypt switch carry no prefix: PBKDF2-SHA256
+# over the hex salt string in master_password_salt, stored as bare hex.
+LEGACY_MASTER_PASSWORD_ITERATIONS = 100000
+
+
+def hash_master_password(master_password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    """
+    Hash the master password with scrypt.
+    
+    scrypt is memory-hard and runs as a single native call that releases
+    the GIL. New hashes use settings.MASTER_PASSWORD_SCRYPT; verification
+    uses the cost stored with the hash.
+    """
+    return hashlib.scrypt(
+        master_password.encode('utf-8'),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        # Leave headroom above the 128 * n * r bytes scrypt needs
+        maxmem=256 * n * r,
+        dklen=32
+    )
+
+
+def encode_master_password(master_password: str, salt: bytes) -> str:
+    """Hash the master password and encode it as 'scrypt$n$r$p$<salt>$<hash>'."""
+    params = settings.MASTER_PASSWORD_SCRYPT
+    digest = hash_master_password(master_password, salt, params['n'], params['r'], params['p'])
+    return '$'.join((
+        MASTER_PASSWORD_ALGORITHM,
+        str(params['n']),
+        str(params['r']),
+        str(params['p']),
+        base64.b64encode(salt).decode('ascii'),
+        base64.b64encode(digest).decode('ascii'),
+    ))
+
+
+def verify_master_password(master_password: str, encoded: str, legacy_salt: str = '') -> bool:
+    """Check a master password against a stored master_password_hash value."""
+    algorithm, sep, rest = encoded.partition('$')
+    if not sep:
+        # Legacy PBKDF2 value; its salt lives in master_password_salt
+        expected = hashlib.pbkdf2_hmac(
+            'sha256',
+            master_password.encode('utf-8'),
+            legacy_salt.encode('utf-8'),
+            LEGACY_MASTER_PASSWORD_ITERATIONS
+        ).hex()
+        return hmac.compare_digest(expected.encode('ascii'), encoded.encode('ascii'))
+    
+    if algorithm != MASTER_PASSWORD_ALGORITHM:
+        raise ValueError(f"Unknown master password algorithm: {algorithm}")
+    # The cost the hash was made with, so changing the settings later
+    # does not break existing hashes
+    n, r, p, salt_b64, hash_b64 = rest.split('$')
+    digest = hash_master_password(
+        master_password, base64.b64decode(salt_b64), int(n), int(r), int(p)
+    )
+    return hmac.compare_digest(digest, base64.b64decode(hash_b64))
+
+
+def serialize_user_min(user: User) -> dict:
+    """Basic user fields shared by the login and current-user responses."""
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'totp_enabled': user.totp_enabled,
+        'password_generator_length': user.password_generator_length,
+        'password_generator_symbols': user.password_generator_symbols,
+    }
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for user registration and profile."""
     
@@ -35,20 +115,16 @@ class UserSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         master_password = validated_data.pop('master_password')
         
-        # Generate salt and hash master password
-        salt = os.urandom(16).hex()
-        master_password_hash = hashlib.pbkdf2_hmac('sha256', 
-                                           master_password.encode('utf-8'), 
-                                           salt.encode('utf-8'), 
-                                           100000).hex()
+        # Generate salt and hash master password (raw bytes until encoded)
+        salt = os.urandom(16)
         
         # Generate encryption key (32 bytes for AES-256)
         encryption_key = os.urandom(32).hex()
         
         user = User.objects.create_user(
             password=password,
-            master_password_hash=master_password_hash,
-            master_password_salt=salt,
+            master_password_hash=encode_master_password(master_password, salt),
+            master_password_salt=base64.b64encode(salt).decode('ascii'),
             encryption_key=encryption_key,
             **validated_data
         )
@@ -57,28 +133,16 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class LoginSerializer(serializers.Serializer):
-    """Serializer for user login."""
+    """
+    Serializer for user login.
+    
+    Only validates the payload shape; login_view authenticates once
+    itself, so credentials are not hashed and checked twice per request.
+    """
     
     email = serializers.EmailField()
     password = serializers.CharField()
     totp_code = serializers.CharField(required=False, allow_blank=True)
-    
-    def validate(self, attrs):
-        email = attrs.get('email')
-        password = attrs.get('password')
-        
-        if email and password:
-            user = authenticate(request=self.context.get('request'),
-                             username=email, password=password)
-            
-            if not user:
-                raise serializers.ValidationError('Invalid credentials')
-            
-            attrs['user'] = user
-        else:
-            raise serializers.ValidationError('Must include email and password')
-        
-        return attrs
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -1,28 +1,45 @@
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import User, UserSession, SecurityLog
+from .authentication import forget_cached_user
+from .middleware import record_security_log
+from .models import User, UserSession
+from .types import SecurityEventType
 import ipaddress
+import re
+
+
+IPV4_OCTET = r'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+IPV4_ADDRESS_RE = re.compile(rf'{IPV4_OCTET}(?:\.{IPV4_OCTET}){{3}}')
+
+# Failed-login security logs allowed per client IP per window (seconds)
+FAILED_LOGIN_LOG_LIMIT = 20
+FAILED_LOGIN_LOG_WINDOW = 60
 
 
 @receiver(post_save, sender=User)
-def create_user_security_settings(sender, instance, created, **kwargs):
-    """Initialize security settings for new users."""
-    if created:
-        # Generate backup codes for new user
-        instance.generate_backup_codes()
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    """Keep the JWT authentication cache in step with the user row."""
+    forget_cached_user(instance.pk)
 
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     """Log successful user login and create session."""
+    ip_address = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    
     # Log security event
-    SecurityLog.objects.create(
+    record_security_log(
+        request,
         user=user,
-        event_type='login',
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        event_type=SecurityEventType.LOGIN,
+        ip_address=ip_address,
+        user_agent=user_agent,
         description='User logged in successfully'
     )
     
@@ -31,13 +48,13 @@ def log_user_login(sender, request, user, **kwargs):
         session_key=request.session.session_key,
         defaults={
             'user': user,
-            'ip_address': get_client_ip(request),
-            'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+            'ip_address': ip_address,
+            'user_agent': user_agent,
             'is_active': True
         }
     )
     
-    # Reset failed login attempts
+    # Reset failed login attempts (no write when already clear)
     user.reset_failed_login()
 
 
@@ -46,9 +63,10 @@ def log_user_logout(sender, request, user, **kwargs):
     """Log user logout and deactivate session."""
     if user:
         # Log security event
-        SecurityLog.objects.create(
+        record_security_log(
+            request,
             user=user,
-            event_type='logout',
+            event_type=SecurityEventType.LOGOUT,
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             description='User logged out'
@@ -64,43 +82,103 @@ def log_user_logout(sender, request, user, **kwargs):
 @receiver(user_login_failed)
 def log_failed_login(sender, credentials, request, **kwargs):
     """Log failed login attempts."""
-    try:
-        user = User.objects.get(email=credentials.get('username', ''))
-        user.increment_failed_login()
-        
-        # Log security event
-        SecurityLog.objects.create(
-            user=user,
-            event_type='failed_login',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
-            description=f'Failed login attempt #{user.failed_login_attempts}'
+    email = credentials.get('username', '')
+    ip_address = get_client_ip(request)
+    
+    # Count the attempt in a single atomic UPDATE; the CASE sees the
+    # pre-update counter, so the attempt that reaches the limit locks.
+    # Accounts that are already locked are not written to again, so a
+    # credential-stuffing run against a locked account costs no row writes.
+    now = timezone.now()
+    updated = User.objects.filter(email=email).exclude(locked_until__gt=now).update(
+        failed_login_attempts=F('failed_login_attempts') + 1,
+        locked_until=Case(
+            When(
+                failed_login_attempts__gte=User.MAX_FAILED_LOGIN_ATTEMPTS - 1,
+                then=Value(now + User.LOCKOUT_DURATION)
+            ),
+            default=F('locked_until')
+        )
+    )
+    
+    # Under a flood from one address keep counting but stop writing logs
+    if is_failed_login_rate_exceeded(ip_address):
+        return
+    
+    user_agent = request.META.get('HTTP_USER_AGENT', '') if request else ''
+    if updated:
+        user_id, attempts = User.objects.filter(email=email).values_list(
+            'id', 'failed_login_attempts'
+        ).get()
+        forget_cached_user(user_id)
+        record_security_log(
+            request,
+            user_id=user_id,
+            event_type=SecurityEventType.FAILED_LOGIN,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            description=f'Failed login attempt #{attempts}'
+        )
+        return
+    
+    locked_user_id = User.objects.filter(email=email).values_list('id', flat=True).first()
+    if locked_user_id is not None:
+        record_security_log(
+            request,
+            user_id=locked_user_id,
+            event_type=SecurityEventType.FAILED_LOGIN,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            description='Failed login attempt while account is locked'
         )
-    except User.DoesNotExist:
+    else:
         # Log failed attempt for non-existent user
-        SecurityLog.objects.create(
+        record_security_log(
+            request,
             user=None,
-            event_type='failed_login',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
-            description=f'Failed login attempt for unknown user: {credentials.get("username", "")}'
+            event_type=SecurityEventType.FAILED_LOGIN,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            description=f'Failed login attempt for unknown user: {email}'
         )
 
 
+def is_failed_login_rate_exceeded(ip_address):
+    """Count a failed login for the IP and report whether it is over the limit."""
+    key = f'failed_login:{ip_address}'
+    cache.add(key, 0, timeout=FAILED_LOGIN_LOG_WINDOW)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Key expired between add() and incr()
+        cache.set(key, 1, timeout=FAILED_LOGIN_LOG_WINDOW)
+        count = 1
+    return count > FAILED_LOGIN_LOG_LIMIT
+
+
 def get_client_ip(request):
     """Get client IP address from request."""
     if not request:
         return '0.0.0.0'
     
+    # Several handlers may fire for one request; parse the headers once.
+    cached_ip = getattr(request, '_client_ip', None)
+    if cached_ip is not None:
+        return cached_ip
+    
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.partition(',')[0].strip()
     else:
-        ip = request.META.get('REMOTE_ADDR')
+        ip = request.META.get('REMOTE_ADDR') or ''
     
-    # Validate IP address
-    try:
-        ipaddress.ip_address(ip)
-        return ip
-    except ValueError:
-        return '0.0.0.0'  # Invalid IP fallback
+    # Validate IP address; the regex handles the common IPv4 case without
+    # going through ipaddress and its exception path.
+    if not IPV4_ADDRESS_RE.fullmatch(ip):
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            ip = '0.0.0.0'  # Invalid IP fallback
+    
+    request._client_ip = ip
+    return ip
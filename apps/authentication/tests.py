@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -38,7 +38,8 @@ class UserModelTests(TestCase):
         self.assertIsNotNone(user.master_password_salt)
         self.assertIsNotNone(user.encryption_key)
         self.assertFalse(user.totp_enabled)
-        self.assertEqual(len(user.backup_codes), 10)
+        # Backup codes are only issued when 2FA is enabled
+        self.assertFalse(user.backup_code_entries.exists())
     
     def test_totp_functionality(self) -> None:
         """Test TOTP generation and verification."""
@@ -75,14 +76,59 @@ class UserModelTests(TestCase):
         # Generate backup codes
         codes = user.generate_backup_codes()
         self.assertEqual(len(codes), 10)
-        self.assertEqual(len(user.backup_codes), 10)
+        self.assertEqual(user.backup_code_entries.filter(used=False).count(), 10)
         
         # Use backup code
         code_to_use = codes[0]
         self.assertTrue(user.use_backup_code(code_to_use))
-        self.assertEqual(len(user.backup_codes), 9)
+        self.assertEqual(user.backup_code_entries.filter(used=False).count(), 9)
         self.assertFalse(user.use_backup_code(code_to_use))  # Already used
     
+    def test_backup_codes_stored_as_keyed_hashes(self) -> None:
+        """Test backup codes are stored as HMACs, never in plaintext."""
+        import hashlib
+        from apps.authentication.models import BackupCode
+        
+        user = User.objects.create_user(
+            email='backuphash@example.com',
+            username='backuphash',
+            password='SecurePass123!'
+        )
+        codes = user.generate_backup_codes()
+        
+        stored = set(user.backup_code_entries.values_list('code_hash', flat=True))
+        self.assertEqual(stored, {BackupCode.hash_code(code) for code in codes})
+        self.assertTrue(stored.isdisjoint(codes))
+        # Not a bare SHA-256 that could be brute-forced from the table alone
+        self.assertNotIn(hashlib.sha256(codes[0].encode('utf-8')).hexdigest(), stored)
+        
+        # Regenerating replaces the old codes
+        new_codes = user.generate_backup_codes()
+        self.assertEqual(user.backup_code_entries.count(), 10)
+        self.assertFalse(user.use_backup_code(codes[0]))
+        self.assertTrue(user.use_backup_code(new_codes[0]))
+    
+    def test_backup_code_concurrent_use(self) -> None:
+        """Test a code used by another request after the lookup is rejected."""
+        import hmac
+        from apps.authentication.models import BackupCode
+        
+        user = User.objects.create_user(
+            email='backuprace@example.com',
+            username='backuprace',
+            password='SecurePass123!'
+        )
+        codes = user.generate_backup_codes()
+        compare_digest = hmac.compare_digest
+        
+        def compare_then_use_elsewhere(a, b):
+            # Another request marks the code used between our read and update
+            BackupCode.objects.filter(user=user).update(used=True)
+            return compare_digest(a, b)
+        
+        with patch('apps.authentication.models.hmac.compare_digest', compare_then_use_elsewhere):
+            self.assertFalse(user.use_backup_code(codes[0]))
+    
     def test_account_lockout(self) -> None:
         """Test account lockout functionality."""
         user = User.objects.create_user(
@@ -280,7 +326,7 @@ class AuthenticationAPITests(APITestCase):
         user.refresh_from_db()
         self.assertFalse(user.totp_enabled)
         self.assertIsNone(user.totp_secret)
-        self.assertEqual(len(user.backup_codes), 0)
+        self.assertFalse(user.backup_code_entries.exists())
     
     def test_security_status(self) -> None:
         """Test security status endpoint."""
@@ -298,7 +344,55 @@ class AuthenticationAPITests(APITestCase):
         self.assertIn('totp_enabled', response.data)
         self.assertIn('backup_codes_count', response.data)
         self.assertIn('failed_login_attempts', response.data)
-    
+        self.assertIn('ETag', response)
+
+    def test_security_status_not_modified(self) -> None:
+        """Test an unchanged security status is revalidated with a 304."""
+        user = User.objects.create_user(
+            email='etag@example.com',
+            username='etag',
+            password='SecurePass123!'
+        )
+        self.client.force_login(user)
+        url = reverse('authentication:security_status')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        # Weak comparison applies to If-None-Match, and * matches any ETag
+        for header in (f'W/{etag}', '*'):
+            with self.subTest(if_none_match=header):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_security_status_etag_changes_with_state(self) -> None:
+        """Test enabling 2FA or a failed login invalidates the security status ETag."""
+        user = User.objects.create_user(
+            email='etag@example.com',
+            username='etag',
+            password='SecurePass123!'
+        )
+        self.client.force_login(user)
+        url = reverse('authentication:security_status')
+        etag = self.client.get(url)['ETag']
+
+        user.increment_failed_login()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['failed_login_attempts'], 1)
+        self.assertNotEqual(response['ETag'], etag)
+        etag = response['ETag']
+
+        user.totp_enabled = True
+        user.save(update_fields=['totp_enabled'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['totp_enabled'])
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_security_logs(self) -> None:
         """Test security logs endpoint."""
         user = User.objects.create_user(
@@ -314,6 +408,34 @@ class AuthenticationAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('logs', response.data)
         self.assertIsInstance(response.data['logs'], list)
+    
+    def test_jwt_user_cache_excludes_secrets(self) -> None:
+        """Test the cached JWT user holds no secret columns."""
+        from django.core.cache import cache
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from apps.authentication.authentication import cached_user_key
+        
+        user = User.objects.create_user(
+            email='jwtcache@example.com',
+            username='jwtcache',
+            password='SecurePass123!',
+            encryption_key='ab' * 32
+        )
+        user.generate_totp_secret()
+        user.save()
+        cache.clear()
+        
+        token = RefreshToken.for_user(user).access_token
+        url = reverse('authentication:security_status')
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        cached = cache.get(cached_user_key(user.pk))
+        self.assertEqual(cached.email, user.email)
+        for field in ('password', 'master_password_hash', 'encryption_key', 'totp_secret'):
+            self.assertNotIn(field, cached.__dict__)
+        # Deferred columns are still read from the database on access
+        self.assertEqual(cached.encryption_key, 'ab' * 32)
 
 
 class SecurityTests(TestCase):
@@ -377,3 +499,81 @@ class SecurityTests(TestCase):
         self.assertEqual(log.user, self.user)
         self.assertEqual(log.event_type, 'login')
         self.assertIsNotNone(log.timestamp)
+    
+    def test_master_password_hash_format(self) -> None:
+        """Test master password hashes carry an algorithm prefix."""
+        from apps.authentication.serializers import encode_master_password, verify_master_password
+        
+        encoded = encode_master_password('correct horse battery', b'0123456789abcdef')
+        self.assertTrue(encoded.startswith('scrypt$'))
+        self.assertTrue(verify_master_password('correct horse battery', encoded))
+        self.assertFalse(verify_master_password('wrong horse battery', encoded))
+        
+        with self.assertRaises(ValueError):
+            verify_master_password('correct horse battery', 'md5$' + encoded.partition('$')[2])
+    
+    def test_master_password_hash_keeps_cost(self) -> None:
+        """Test the scrypt cost is stored with the hash and used to verify it."""
+        from django.test import override_settings
+        from apps.authentication.serializers import encode_master_password, verify_master_password
+        
+        with override_settings(MASTER_PASSWORD_SCRYPT={'n': 2 ** 10, 'r': 8, 'p': 1}):
+            encoded = encode_master_password('correct horse battery', b'0123456789abcdef')
+        self.assertEqual(encoded.split('$')[:4], ['scrypt', '1024', '8', '1'])
+        
+        # Raising the configured cost does not invalidate existing hashes
+        self.assertTrue(verify_master_password('correct horse battery', encoded))
+    
+    def test_legacy_master_password_hash(self) -> None:
+        """Test unprefixed PBKDF2 master password hashes still verify."""
+        import hashlib
+        from apps.authentication.serializers import verify_master_password
+        
+        salt = '00112233445566778899aabbccddeeff'
+        legacy = hashlib.pbkdf2_hmac(
+            'sha256', b'correct horse battery', salt.encode('utf-8'), 100000
+        ).hex()
+        self.assertTrue(verify_master_password('correct horse battery', legacy, salt))
+        self.assertFalse(verify_master_password('wrong horse battery', legacy, salt))
+
+
+class BackupCodeMigrationTests(TransactionTestCase):
+    """Test the move of JSON backup codes into the BackupCode table."""
+    
+    migrate_from = [('authentication', '0002_security_log_session_indexes')]
+    migrate_to = [('authentication', '0003_backup_code_table')]
+    
+    def migrate(self, targets):
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+    
+    def tearDown(self) -> None:
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+    
+    def test_backup_codes_copied_as_keyed_hashes(self) -> None:
+        """Test plaintext JSON codes become keyed hashes usable by the model."""
+        old_apps = self.migrate(self.migrate_from)
+        OldUser = old_apps.get_model('authentication', 'User')
+        old_user = OldUser.objects.create(
+            email='migrated@example.com',
+            username='migrated',
+            backup_codes=['0a1b2c3d', '4e5f6a7b']
+        )
+        
+        self.migrate(self.migrate_to)
+        
+        user = User.objects.get(pk=old_user.pk)
+        self.assertEqual(user.backup_code_entries.filter(used=False).count(), 2)
+        self.assertFalse(user.backup_code_entries.filter(code_hash='0a1b2c3d').exists())
+        self.assertTrue(user.use_backup_code('0a1b2c3d'))
+        self.assertFalse(user.use_backup_code('0a1b2c3d'))
+        self.assertTrue(user.use_backup_code('4e5f6a7b'))
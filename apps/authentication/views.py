@@ -1,21 +1,28 @@
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import forget_cached_user
+from .middleware import record_security_log
 from .models import User, SecurityLog
-from .serializers import UserSerializer, LoginSerializer
+from .serializers import UserSerializer, LoginSerializer, serialize_user_min
 from .types import (
     APIResponse, SecurityStatusResponse, SecurityLogResponse,
-    AuthenticationResult, TOTPVerificationResult, SecurityContext
+    AuthenticationResult, TOTPVerificationResult, SecurityContext,
+    SecurityEventType
 )
+import hashlib
 import pyotp
 import secrets
 from typing import Dict, Any, Optional
@@ -31,9 +38,10 @@ def register(request: Request) -> Response:
         user = serializer.save()
         
         # Log registration
-        SecurityLog.objects.create(
+        record_security_log(
+            request,
             user=user,
-            event_type='login',  # Using login event type for registration
+            event_type=SecurityEventType.LOGIN,  # Using login event type for registration
             ip_address=get_client_ip(request),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             description='User account created'
@@ -60,69 +68,59 @@ def login_view(request: Request) -> Response:
         password = serializer.validated_data['password']
         totp_code = serializer.validated_data.get('totp_code', '')
         
-        try:
-            user = User.objects.get(email=email)
-            
-            # Check if account is locked
-            if user.is_account_locked():
+        # Authenticate first: the backend's lookup is the only user query on
+        # the happy path, and failures are counted by the user_login_failed
+        # signal handler.
+        user = authenticate(request, username=email, password=password)
+        if user is None:
+            if User.objects.filter(email=email, locked_until__gt=timezone.now()).exists():
                 return Response({
                     'error': 'Account is temporarily locked due to failed login attempts'
                 }, status=status.HTTP_423_LOCKED)
+            return Response({
+                'error': 'Invalid credentials'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        # Check if account is locked
+        if user.is_account_locked():
+            return Response({
+                'error': 'Account is temporarily locked due to failed login attempts'
+            }, status=status.HTTP_423_LOCKED)
+        
+        # Check 2FA if enabled
+        if user.totp_enabled:
+            if not totp_code:
+                response_data: APIResponse = {
+                    'error': '2FA code required',
+                    'require_2fa': True
+                }
+                return Response(response_data, status=status.HTTP_202_ACCEPTED)
             
-            # Authenticate user
-            auth_user = authenticate(request, username=email, password=password)
-            if not auth_user:
-                # Increment failed attempts
+            if not user.verify_totp(totp_code):
                 user.increment_failed_login()
+                forget_cached_user(user.pk)
                 return Response({
-                    'error': 'Invalid credentials'
+                    'error': 'Invalid 2FA code'
                 }, status=status.HTTP_401_UNAUTHORIZED)
-            
-            # Check 2FA if enabled
-            if user.totp_enabled:
-                if not totp_code:
-                    response_data: APIResponse = {
-                        'error': '2FA code required',
-                        'require_2fa': True
-                    }
-                    return Response(response_data, status=status.HTTP_202_ACCEPTED)
-                
-                if not user.verify_totp(totp_code):
-                    user.increment_failed_login()
-                    return Response({
-                        'error': 'Invalid 2FA code'
-                    }, status=status.HTTP_401_UNAUTHORIZED)
-            
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(auth_user)
-            access_token = refresh.access_token
-            
-            # Prepare user data
-            user_data = {
-                'id': auth_user.id,
-                'email': auth_user.email,
-                'username': auth_user.username,
-                'totp_enabled': auth_user.totp_enabled,
-                'password_generator_length': auth_user.password_generator_length,
-                'password_generator_symbols': auth_user.password_generator_symbols,
-            }
-            
-            # Login user (for session auth compatibility)
-            login(request, auth_user)
-            
-            response_data = {
-                'message': 'Login successful',
-                'token': str(access_token),
-                'refresh': str(refresh),
-                'user': user_data
-            }
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
-        except User.DoesNotExist:
-            return Response({
-                'error': 'Invalid credentials'
-            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        # Generate JWT tokens
+        refresh = RefreshToken.for_user(user)
+        access_token = refresh.access_token
+        
+        # Prepare user data
+        user_data = serialize_user_min(user)
+        
+        # Login user (for session auth compatibility)
+        login(request, user)
+        
+        response_data = {
+            'message': 'Login successful',
+            'token': str(access_token),
+            'refresh': str(refresh),
+            'user': user_data
+        }
+        
+        return Response(response_data, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -143,17 +141,16 @@ def logout_view(request: Request) -> Response:
 def get_current_user(request: Request) -> Response:
     """Get current user information."""
     user = request.user
+    # The authenticated user is a cached projection; load the profile
+    # columns in one query instead of one per deferred field.
+    user.refresh_from_db(fields=[
+        'username', 'password_generator_length', 'password_generator_symbols',
+        'last_password_change', 'failed_login_attempts'
+    ])
     
-    user_data = {
-        'id': user.id,
-        'email': user.email,
-        'username': user.username,
-        'totp_enabled': user.totp_enabled,
-        'password_generator_length': user.password_generator_length,
-        'password_generator_symbols': user.password_generator_symbols,
-        'last_password_change': user.last_password_change,
-        'failed_login_attempts': user.failed_login_attempts,
-    }
+    user_data = serialize_user_min(user)
+    user_data['last_password_change'] = user.last_password_change
+    user_data['failed_login_attempts'] = user.failed_login_attempts
     
     return Response(user_data, status=status.HTTP_200_OK)
 
@@ -164,20 +161,21 @@ def enable_2fa(request: Request) -> Response:
     """Enable 2FA for user account."""
     user = request.user
     
-    # Generate TOTP secret
-    totp_secret = user.generate_totp_secret()
-    user.save()
+    # Store the new secret and backup codes together; only the secret
+    # column of the user row needs writing.
+    with transaction.atomic():
+        totp_secret = user.generate_totp_secret()
+        user.save(update_fields=['totp_secret'])
+        backup_codes = user.generate_backup_codes()
     
     # Get provisioning URI for QR code
     totp_uri = user.get_totp_uri()
     
-    # Generate backup codes
-    backup_codes = user.generate_backup_codes()
-    
     # Log security event
-    SecurityLog.objects.create(
+    record_security_log(
+        request,
         user=user,
-        event_type='2fa_enabled',
+        event_type=SecurityEventType.TWO_FA_ENABLED,
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', ''),
         description='2FA enabled for user account'
@@ -195,23 +193,25 @@ def enable_2fa(request: Request) -> Response:
 @permission_classes([IsAuthenticated])
 def verify_2fa_setup(request: Request) -> Response:
     """Verify 2FA setup with test code."""
-    totp_code = request.data.get('totp_code')
+    totp_code = request.data.get('totp_code') or ''
+    user = request.user
+    
+    # Run the verification before branching, as in disable_2fa
+    code_valid = user.verify_totp(totp_code)
     
     if not totp_code:
         return Response({
             'error': 'TOTP code required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    user = request.user
-    
     if not user.totp_secret:
         return Response({
             'error': '2FA setup not initiated'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    if user.verify_totp(totp_code):
+    if code_valid:
         user.totp_enabled = True
-        user.save()
+        user.save(update_fields=['totp_enabled'])
         
         response_data: APIResponse = {
             'message': '2FA enabled successfully'
@@ -227,17 +227,19 @@ def verify_2fa_setup(request: Request) -> Response:
 @permission_classes([IsAuthenticated])
 def disable_2fa(request: Request) -> Response:
     """Disable 2FA for user account."""
-    password = request.data.get('password')
+    password = request.data.get('password') or ''
+    user = request.user
+    
+    # Verify password; the hash check runs even when no password was sent
+    # so every early return costs the same hasher work.
+    password_valid = user.check_password(password)
     
     if not password:
         return Response({
             'error': 'Password required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    user = request.user
-    
-    # Verify password
-    if not user.check_password(password):
+    if not password_valid:
         return Response({
             'error': 'Invalid password'
         }, status=status.HTTP_401_UNAUTHORIZED)
@@ -245,13 +247,14 @@ def disable_2fa(request: Request) -> Response:
     # Disable 2FA
     user.totp_enabled = False
     user.totp_secret = None
-    user.backup_codes = []
-    user.save()
+    user.save(update_fields=['totp_enabled', 'totp_secret'])
+    user.clear_backup_codes()
     
     # Log security event
-    SecurityLog.objects.create(
+    record_security_log(
+        request,
         user=user,
-        event_type='2fa_disabled',
+        event_type=SecurityEventType.TWO_FA_DISABLED,
         ip_address=get_client_ip(request),
         user_agent=request.META.get('HTTP_USER_AGENT', ''),
         description='2FA disabled for user account'
@@ -268,33 +271,43 @@ def disable_2fa(request: Request) -> Response:
 def security_status(request: Request) -> Response:
     """Get user security status."""
     user = request.user
+    user.refresh_from_db(fields=['last_password_change', 'failed_login_attempts', 'locked_until'])
     
     response_data: SecurityStatusResponse = {
         'totp_enabled': user.totp_enabled,
-        'backup_codes_count': len(user.backup_codes),
+        'backup_codes_count': user.backup_code_entries.filter(used=False).count(),
         'last_password_change': user.last_password_change,
         'failed_login_attempts': user.failed_login_attempts,
         'is_locked': user.is_account_locked(),
         'locked_until': user.locked_until
     }
-    return Response(response_data, status=status.HTTP_200_OK)
+    
+    # Let polling clients revalidate: an unchanged status is answered with
+    # an empty 304 instead of being serialized again.
+    etag = quote_etag(hashlib.blake2b(
+        repr(sorted(response_data.items())).encode('utf-8'), digest_size=8
+    ).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        # A 304 must repeat the validator it confirms
+        not_modified['ETag'] = etag
+        return not_modified
+    
+    response = Response(response_data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def security_logs(request: Request) -> Response:
     """Get user security logs."""
-    logs = SecurityLog.objects.filter(user=request.user).order_by('-timestamp')[:50]
-    
-    logs_data: list[SecurityLogResponse] = []
-    for log in logs:
-        log_entry: SecurityLogResponse = {
-            'event_type': log.event_type,
-            'description': log.description,
-            'ip_address': log.ip_address,
-            'timestamp': log.timestamp
-        }
-        logs_data.append(log_entry)
+    # values() yields the response dicts directly, without model instances
+    logs_data: list[SecurityLogResponse] = list(
+        SecurityLog.objects.filter(user=request.user).order_by('-timestamp').values(
+            'event_type', 'description', 'ip_address', 'timestamp'
+        )[:50]
+    )
     
     return Response({
         'logs': logs_data
@@ -305,7 +318,8 @@ def get_client_ip(request: Request) -> str:
     """Get client IP address from request."""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        # Only the first hop matters; partition stops at the first comma
+        ip = x_forwarded_for.partition(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
     
@@ -56,7 +56,12 @@ class PasswordEntryAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         """Optimize queryset with related user."""
-        return super().get_queryset(request).select_related('user')
+        queryset = super().get_queryset(request).select_related('user')
+        # The change list never shows the ciphertext or custom fields
+        match = request.resolver_match
+        if match and match.url_name == 'passwords_passwordentry_changelist':
+            queryset = queryset.defer('encrypted_data', 'custom_fields')
+        return queryset
 
 
 @admin.register(PasswordCategory)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:25
+
+from django.db import migrations
+
+
+def create_tags_gin_index(apps, schema_editor):
+    """Index tags for @> (tags__contains) lookups; only PostgreSQL has GIN."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS pwentry_tags_gin "
+        "ON password_entries USING gin (tags jsonb_path_ops)"
+    )
+
+
+def drop_tags_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS pwentry_tags_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("passwords", "0002_passwordentry_custom_fields_passwordentry_source_and_more"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="passwordentry",
+            name="password_en_tags_9d7644_idx",
+        ),
+        migrations.RunPython(create_tags_gin_index, drop_tags_gin_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("passwords", "0003_tags_gin_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="passwordentry",
+            name="password_en_user_id_98fdca_idx",
+        ),
+        migrations.AddIndex(
+            model_name="passwordentry",
+            index=models.Index(
+                condition=models.Q(("is_favorite", True)),
+                fields=["user"],
+                name="pwentry_user_fav_idx",
+            ),
+        ),
+    ]
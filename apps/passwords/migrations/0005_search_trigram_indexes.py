@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:40
+
+from django.db import migrations
+
+# Columns matched by the list view's ?search= icontains lookups
+SEARCH_COLUMNS = ("title", "username_hint", "url_hint")
+
+
+def create_search_trigram_indexes(apps, schema_editor):
+    """Index the search columns for icontains; only PostgreSQL has pg_trgm.
+
+    Django renders icontains as UPPER(col) LIKE UPPER('%x%'), so the trigram
+    indexes are built on UPPER(col) for the planner to use them.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS pwentry_{column}_trgm "
+            f"ON password_entries USING gin (UPPER({column}) gin_trgm_ops)"
+        )
+
+
+def drop_search_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS pwentry_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("passwords", "0004_favorite_partial_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_trigram_indexes, drop_search_trigram_indexes),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-15 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("passwords", "0005_search_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="passwordentry",
+            index=models.Index(
+                fields=["user", "updated_at"], name="password_en_user_id_6e8f2f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="securityaudit",
+            index=models.Index(
+                fields=["user", "event_type", "timestamp"],
+                name="security_au_user_id_33d8fe_idx",
+            ),
+        ),
+    ]
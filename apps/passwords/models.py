@@ -1,16 +1,24 @@
 from django.db import models
+from django.db.models.functions import Now
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.conf import settings
 from typing import Optional, List, Dict, Any
 import json
 import uuid
+from urllib.parse import urlsplit
 
 from core.crypto.encryption import PasswordEncryption, KeyManager
 from core.crypto.exceptions import EncryptionError, DecryptionError
 
 User = get_user_model()
 
+# Columns written by PasswordEntry.apply_data, plus the auto_now timestamp
+ENTRY_DATA_FIELDS = [
+    'title', 'encrypted_data', 'category', 'tags', 'is_favorite', 'custom_fields',
+    'source', 'source_id', 'username_hint', 'url_hint', 'has_notes', 'updated_at',
+]
+
 
 class PasswordEntry(models.Model):
     """Encrypted password entry for users."""
@@ -43,9 +51,15 @@ class PasswordEntry(models.Model):
         indexes = [
             models.Index(fields=['user', 'title']),
             models.Index(fields=['user', 'category']),
-            models.Index(fields=['user', 'is_favorite']),
+            models.Index(
+                fields=['user'],
+                condition=models.Q(is_favorite=True),
+                name='pwentry_user_fav_idx',
+            ),
             models.Index(fields=['user', 'created_at']),
-            models.Index(fields=['tags']),
+            models.Index(fields=['user', 'updated_at']),
+            # tags has a GIN index on PostgreSQL, created in migration 0003;
+            # title/username_hint/url_hint have trigram ones from 0005
         ]
         ordering = ['-is_favorite', 'title']
     
@@ -54,83 +68,111 @@ class PasswordEntry(models.Model):
     
     def get_encryption_key(self) -> bytes:
         """Get user's encryption key."""
-        # The encryption_key is stored as a hex string in the database
-        # Decode it to bytes for use with AES-256
-        return bytes.fromhex(self.user.encryption_key)
+        # The encryption_key is stored as a hex string in the database.
+        # Decode it to bytes for use with AES-256, caching the result on the
+        # user instance. Only entries holding that same instance share it
+        # (select_related gives each row its own copy), so bulk readers
+        # should assign entry.user themselves.
+        user = self.user
+        cached = getattr(user, '_encryption_key_bytes', None)
+        if cached is None or cached[0] != user.encryption_key:
+            cached = (user.encryption_key, bytes.fromhex(user.encryption_key))
+            user._encryption_key_bytes = cached
+        return cached[1]
+    
+    def get_encryptor(self) -> PasswordEncryption:
+        """Get the encryptor for the user's key, cached beside the key bytes."""
+        key = self.get_encryption_key()
+        user = self.user
+        encryptor = getattr(user, '_encryptor', None)
+        if encryptor is None or encryptor.master_key != key:
+            encryptor = PasswordEncryption(key)
+            user._encryptor = encryptor
+        return encryptor
     
-    def encrypt_data(self, data: Dict[str, Any]) -> str:
+    def encrypt_data(self, data: Dict[str, Any],
+                     encryptor: Optional[PasswordEncryption] = None) -> str:
         """Encrypt password entry data."""
         try:
-            key = self.get_encryption_key()
-            encryptor = PasswordEncryption(key)
-            return encryptor.encrypt_password_entry(
-                title=data.get('title', ''),
-                username=data.get('username', ''),
-                password=data.get('password', ''),
-                url=data.get('url', ''),
-                notes=data.get('notes', ''),
-                username2=data.get('username2'),
-                username3=data.get('username3'),
-                otp_url=data.get('otp_url'),
-                custom_fields=data.get('custom_fields')
-            )
+            if encryptor is None:
+                encryptor = self.get_encryptor()
+            return encryptor.encrypt_password_entry(**self.encryption_fields(data))
         except Exception as e:
             raise EncryptionError(f"Failed to encrypt password entry: {str(e)}")
     
+    @staticmethod
+    def encryption_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Arguments for PasswordEncryption.encrypt_password_entry from entry data."""
+        return {
+            'title': data.get('title', ''),
+            'username': data.get('username', ''),
+            'password': data.get('password', ''),
+            'url': data.get('url', ''),
+            'notes': data.get('notes', ''),
+            'username2': data.get('username2'),
+            'username3': data.get('username3'),
+            'otp_url': data.get('otp_url'),
+            'custom_fields': data.get('custom_fields'),
+        }
+    
     def decrypt_data(self) -> Dict[str, Any]:
         """Decrypt password entry data."""
         try:
-            key = self.get_encryption_key()
-            encryptor = PasswordEncryption(key)
-            return encryptor.decrypt_password_entry(self.encrypted_data)
+            return self.get_encryptor().decrypt_password_entry(self.encrypted_data)
         except Exception as e:
             raise DecryptionError(f"Failed to decrypt password entry: {str(e)}")
     
+    def _get_decrypted(self) -> Dict[str, Any]:
+        """Decrypted data shared by the field getters, refreshed when the ciphertext changes."""
+        cached = getattr(self, '_decrypted', None)
+        if cached is None or cached[0] != self.encrypted_data:
+            cached = (self.encrypted_data, self.decrypt_data())
+            self._decrypted = cached
+        return cached[1]
+    
     def get_password(self) -> str:
         """Get decrypted password."""
-        data = self.decrypt_data()
-        return data.get('password', '')
+        return self._get_decrypted().get('password', '')
     
     def get_username(self) -> str:
         """Get decrypted username."""
-        data = self.decrypt_data()
-        return data.get('username', '')
+        return self._get_decrypted().get('username', '')
     
     def get_url(self) -> Optional[str]:
         """Get decrypted URL."""
-        data = self.decrypt_data()
-        return data.get('url')
+        return self._get_decrypted().get('url')
     
     def get_notes(self) -> Optional[str]:
         """Get decrypted notes."""
-        data = self.decrypt_data()
-        return data.get('notes')
+        return self._get_decrypted().get('notes')
     
     def update_hints(self, data: Dict[str, Any]) -> None:
         """Update searchable hints from encrypted data."""
-        # Username hint (first 3 characters)
-        username = data.get('username', '')
-        if len(username) >= 3:
-            self.username_hint = username[:3] + '*' * (len(username) - 3)
-        else:
-            self.username_hint = username + '*' * max(0, 3 - len(username))
+        # Username hint (first 3 characters, masked to the full length)
+        username = data.get('username') or ''
+        self.username_hint = username[:3].ljust(max(len(username), 3), '*')[:255]
         
         # URL hint (domain only)
-        url = data.get('url', '')
-        if url and ('://' in url):
-            domain = url.split('://')[1].split('/')[0]
-            self.url_hint = domain
-        else:
-            self.url_hint = ''
+        try:
+            hostname = urlsplit(data.get('url') or '').hostname
+        except ValueError:
+            hostname = None  # Malformed URL, e.g. an unclosed IPv6 bracket
+        self.url_hint = (hostname or '')[:255]
         
         # Notes flag
-        notes = data.get('notes', '')
-        self.has_notes = bool(notes.strip() if notes else False)
+        notes = data.get('notes')
+        self.has_notes = bool(notes and notes.strip())
     
     def update_from_data(self, data: Dict[str, Any]) -> None:
         """Update entry from decrypted data."""
+        self.apply_data(data)
+        self.save()
+    
+    def apply_data(self, data: Dict[str, Any],
+                   encryptor: Optional[PasswordEncryption] = None) -> None:
+        """Set every stored field from decrypted data without saving."""
         self.title = data.get('title', '')
-        self.encrypted_data = self.encrypt_data(data)
+        self.encrypted_data = self.encrypt_data(data, encryptor)
         self.category = data.get('category', '')
         self.tags = data.get('tags', [])
         self.is_favorite = data.get('is_favorite', False)
@@ -138,12 +180,12 @@ class PasswordEntry(models.Model):
         self.source = data.get('source', '')
         self.source_id = data.get('source_id', '')
         self.update_hints(data)
-        self.save()
     
     def access(self) -> None:
         """Record access to this entry."""
+        # Plain UPDATE: no save() machinery or signals on the read path
         self.last_accessed = timezone.now()
-        self.save(update_fields=['last_accessed'])
+        PasswordEntry.objects.filter(pk=self.pk).update(last_accessed=self.last_accessed)
     
     @classmethod
     def create_entry(cls, user: User, title: str, username: str, password: str,
@@ -154,7 +196,7 @@ class PasswordEntry(models.Model):
                      custom_fields: Optional[Dict[str, Any]] = None,
                      source: str = '', source_id: str = '') -> 'PasswordEntry':
         """Create a new password entry."""
-        data = {
+        entry = cls.build_entry(user, {
             'title': title,
             'username': username,
             'password': password,
@@ -169,19 +211,58 @@ class PasswordEntry(models.Model):
             'custom_fields': custom_fields or {},
             'source': source,
             'source_id': source_id
-        }
+        })
+        entry.save()
+
+        return entry
 
-        entry = cls(user=user, title=title, category=category or '',
-                    tags=tags or [], is_favorite=is_favorite,
-                    custom_fields=custom_fields or {},
-                    source=source, source_id=source_id)
+    @classmethod
+    def build_entry(cls, user: User, data: Dict[str, Any],
+                    encryptor: Optional[PasswordEncryption] = None,
+                    encrypted_data: Optional[str] = None) -> 'PasswordEntry':
+        """Build an unsaved entry from decrypted data, reusing an encryptor or ready ciphertext if given."""
+        entry = cls(user=user, title=data.get('title', ''),
+                    category=data.get('category') or '',
+                    tags=data.get('tags') or [],
+                    is_favorite=data.get('is_favorite', False),
+                    custom_fields=data.get('custom_fields') or {},
+                    source=data.get('source', ''),
+                    source_id=data.get('source_id', ''))
 
-        entry.encrypted_data = entry.encrypt_data(data)
+        if encrypted_data is None:
+            encrypted_data = entry.encrypt_data(data, encryptor)
+        entry.encrypted_data = encrypted_data
         entry.update_hints(data)
-        entry.save()
 
         return entry
 
+    @classmethod
+    def bulk_create_entries(cls, user: User, rows: List[Dict[str, Any]],
+                            batch_size: int = 1000) -> List['PasswordEntry']:
+        """Create many entries with one batch encryption and batched INSERTs."""
+        encryptor = PasswordEncryption(bytes.fromhex(user.encryption_key))
+        try:
+            encrypted = encryptor.encrypt_password_entries(
+                [cls.encryption_fields(row) for row in rows]
+            )
+        except Exception as e:
+            raise EncryptionError(f"Failed to encrypt password entries: {str(e)}")
+        entries = [
+            cls.build_entry(user, row, encrypted_data=encrypted_data)
+            for row, encrypted_data in zip(rows, encrypted)
+        ]
+        return cls.objects.bulk_create(entries, batch_size=batch_size)
+
+    @classmethod
+    def bulk_update_entries(cls, entries: List['PasswordEntry'],
+                            batch_size: int = 1000) -> int:
+        """Save entries changed by apply_data with batched UPDATEs."""
+        # bulk_update skips pre_save, so auto_now has to be applied by hand
+        now = timezone.now()
+        for entry in entries:
+            entry.updated_at = now
+        return cls.objects.bulk_update(entries, ENTRY_DATA_FIELDS, batch_size=batch_size)
+
 
 class PasswordCategory(models.Model):
     """Password categories for organization."""
@@ -211,16 +292,15 @@ class PasswordCategory(models.Model):
             {'name': 'Shopping', 'color': '#e83e8c', 'icon': 'shopping-cart'},
         ]
         
-        categories = []
-        for default in defaults:
-            category, created = cls.objects.get_or_create(
-                user=user,
-                name=default['name'],
-                defaults=default
-            )
-            categories.append(category)
+        # One INSERT for all defaults; rows that already exist are left alone
+        cls.objects.bulk_create(
+            [cls(user=user, **default) for default in defaults],
+            ignore_conflicts=True
+        )
         
-        return categories
+        names = [default['name'] for default in defaults]
+        categories = cls.objects.filter(user=user, name__in=names)
+        return sorted(categories, key=lambda category: names.index(category.name))
 
 
 class PasswordShare(models.Model):
@@ -252,14 +332,31 @@ class PasswordShare(models.Model):
     def __str__(self) -> str:
         return f"{self.entry.title} shared by {self.shared_by.email} to {self.shared_with.email}"
     
+    @classmethod
+    def with_status(cls, queryset: models.QuerySet) -> models.QuerySet:
+        """Annotate shares with their expired/valid flags, computed in SQL."""
+        expired = models.Q(expires_at__isnull=False) & models.Q(expires_at__lt=Now())
+        return queryset.annotate(
+            status_is_expired=models.ExpressionWrapper(expired, output_field=models.BooleanField()),
+            status_is_valid=models.ExpressionWrapper(
+                models.Q(is_active=True) & ~expired, output_field=models.BooleanField()
+            ),
+        )
+    
     def is_expired(self) -> bool:
         """Check if share has expired."""
+        annotated = getattr(self, 'status_is_expired', None)
+        if annotated is not None:
+            return annotated
         if self.expires_at is None:
             return False
         return timezone.now() > self.expires_at
     
     def is_valid(self) -> bool:
         """Check if share is valid and active."""
+        annotated = getattr(self, 'status_is_valid', None)
+        if annotated is not None:
+            return annotated
         return self.is_active and not self.is_expired()
 
 
@@ -290,6 +387,7 @@ class SecurityAudit(models.Model):
         db_table = 'security_audits'
         indexes = [
             models.Index(fields=['user', 'timestamp']),
+            models.Index(fields=['user', 'event_type', 'timestamp']),
             models.Index(fields=['event_type']),
             models.Index(fields=['timestamp']),
         ]
@@ -1,11 +1,29 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from .models import PasswordEntry, PasswordCategory, PasswordShare, SecurityAudit
 from core.crypto.encryption import PasswordGenerator, validate_password_strength
 from typing import Dict, Any, List, Optional
+import os
 
 User = get_user_model()
 
+# Writable entry fields applied by PasswordEntrySerializer.update
+ENTRY_UPDATE_FIELDS = (
+    'title', 'username', 'password', 'url', 'notes', 'category', 'tags',
+    'is_favorite', 'custom_fields', 'source', 'source_id'
+)
+# Entry fields kept in plaintext columns rather than the encrypted payload
+ENTRY_COLUMN_FIELDS = ('category', 'tags', 'is_favorite', 'source', 'source_id')
+
+# Choices shared by the serializer fields below
+SHARE_TYPES = tuple(value for value, _ in PasswordShare.SHARE_TYPES)
+IMPORT_FORMATS = ('csv', 'json', '1password')
+IMPORT_EXTENSIONS = frozenset({'.csv', '.json'})
+EXPORT_FORMATS = ('csv', 'json')
+MERGE_STRATEGIES = ('skip', 'overwrite', 'merge')
+BULK_OPERATIONS = ('delete', 'move', 'tag', 'share')
+
 
 class PasswordEntrySerializer(serializers.ModelSerializer):
     """Serializer for password entries."""
@@ -69,28 +87,55 @@ class PasswordEntrySerializer(serializers.ModelSerializer):
 
     def update(self, instance: PasswordEntry, validated_data: Dict[str, Any]) -> PasswordEntry:
         """Update encrypted password entry."""
-        # Get current encrypted data
+        # Changes confined to plaintext columns skip the decrypt/re-encrypt
+        if validated_data.keys() <= set(ENTRY_COLUMN_FIELDS):
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save(update_fields=[*validated_data, 'updated_at'])
+            return instance
+
+        # Start from the current state: the encrypted payload plus the
+        # plaintext columns it does not carry, so untouched fields survive.
         current_data = instance.decrypt_data()
+        current_data.update(
+            (field, getattr(instance, field)) for field in ENTRY_COLUMN_FIELDS
+        )
 
         # Update with new data
-        for field in ['username', 'url', 'notes', 'category', 'tags', 'is_favorite', 'custom_fields']:
-            if field in validated_data:
-                current_data[field] = validated_data[field]
+        current_data.update(
+            (field, validated_data[field])
+            for field in ENTRY_UPDATE_FIELDS if field in validated_data
+        )
 
-        if 'password' in validated_data:
-            current_data['password'] = validated_data['password']
+        instance.update_from_data(current_data)
+        return instance
 
-        if 'title' in validated_data:
-            current_data['title'] = validated_data['title']
 
-        # Update source tracking fields
-        if 'source' in validated_data:
-            instance.source = validated_data['source']
-        if 'source_id' in validated_data:
-            instance.source_id = validated_data['source_id']
+# Plain columns shown for each row of the entry list, in response order
+ENTRY_LIST_FIELDS = (
+    'id', 'title', 'category', 'tags', 'is_favorite', 'created_at', 'updated_at',
+    'last_accessed', 'username_hint', 'url_hint', 'has_notes',
+    'custom_fields', 'source', 'source_id'
+)
 
-        instance.update_from_data(current_data)
-        return instance
+_list_datetime_field = serializers.DateTimeField()
+
+
+def serialize_entry_rows(rows) -> List[Dict[str, Any]]:
+    """
+    Render .values(*ENTRY_LIST_FIELDS) rows like PasswordEntrySerializer.
+    
+    List rows are plain column reads, so the per-field serializer machinery
+    is skipped; only the datetimes need DRF's formatting.
+    """
+    to_datetime = _list_datetime_field.to_representation
+    results = []
+    for row in rows:
+        for name in ('created_at', 'updated_at', 'last_accessed'):
+            if row[name] is not None:
+                row[name] = to_datetime(row[name])
+        results.append(row)
+    return results
 
 
 class PasswordEntryDetailSerializer(PasswordEntrySerializer):
@@ -107,29 +152,52 @@ class PasswordEntryDetailSerializer(PasswordEntrySerializer):
             'decrypted_password', 'decrypted_username', 'decrypted_url', 'decrypted_notes', 'decrypted_custom_fields'
         ]
 
+    DECRYPTED_FIELDS = (
+        'decrypted_password', 'decrypted_username', 'decrypted_url', 'decrypted_notes', 'decrypted_custom_fields'
+    )
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        # ?fields=decrypted_password,... limits which secrets are revealed
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request is not None else None
+        if requested:
+            keep = set(requested.split(','))
+            for name in self.DECRYPTED_FIELDS:
+                if name not in keep:
+                    self.fields.pop(name, None)
+
     def to_representation(self, instance: PasswordEntry) -> Dict[str, Any]:
         """Add decrypted fields to representation."""
         data = super().to_representation(instance)
 
+        requested = [name for name in self.DECRYPTED_FIELDS if name in self.fields]
+        if not requested:
+            # Nothing secret asked for: no decryption and no access record
+            return data
+
         # Add decrypted fields
         try:
             decrypted_data = instance.decrypt_data()
-            data['decrypted_password'] = decrypted_data.get('password', '')
-            data['decrypted_username'] = decrypted_data.get('username', '')
-            data['decrypted_url'] = decrypted_data.get('url') or ''
-            data['decrypted_notes'] = decrypted_data.get('notes') or ''
-            data['decrypted_custom_fields'] = decrypted_data.get('custom_fields', {})
+            values = {
+                'decrypted_password': decrypted_data.get('password', ''),
+                'decrypted_username': decrypted_data.get('username', ''),
+                'decrypted_url': decrypted_data.get('url') or '',
+                'decrypted_notes': decrypted_data.get('notes') or '',
+                'decrypted_custom_fields': decrypted_data.get('custom_fields', {}),
+            }
 
             # Log access
             instance.access()
 
         except Exception:
             # If decryption fails, don't expose error
-            data['decrypted_password'] = '***'
-            data['decrypted_username'] = '***'
-            data['decrypted_url'] = '***'
-            data['decrypted_notes'] = '***'
-            data['decrypted_custom_fields'] = {}
+            values = {name: '***' for name in self.DECRYPTED_FIELDS}
+            values['decrypted_custom_fields'] = {}
+
+        for name in requested:
+            data[name] = values[name]
 
         return data
 
@@ -144,8 +212,13 @@ class PasswordCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'color', 'icon', 'created_at', 'entry_count']
     
     def get_entry_count(self, obj: PasswordCategory) -> int:
-        """Get number of entries in this category."""
-        return obj.user.password_entries.filter(category=obj.name).count()
+        """Number of the user's entries filed under this category."""
+        # Querysets listing many categories can annotate entry_count to
+        # save a COUNT per row; anything else is counted here.
+        entry_count = getattr(obj, 'entry_count', None)
+        if entry_count is not None:
+            return entry_count
+        return PasswordEntry.objects.filter(user_id=obj.user_id, category=obj.name).count()
 
 
 class PasswordShareSerializer(serializers.ModelSerializer):
@@ -164,7 +237,9 @@ class PasswordShareSerializer(serializers.ModelSerializer):
             'shared_with', 'shared_with_email', 'share_type', 'message',
             'created_at', 'expires_at', 'is_active', 'is_expired', 'is_valid'
         ]
-        read_only_fields = ['shared_by', 'created_at']
+        # The entry comes from the URL (see share_password), so it is not
+        # looked up from the request body
+        read_only_fields = ['entry', 'shared_by', 'created_at']
     
     def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
         """Validate share data."""
@@ -175,11 +250,16 @@ class PasswordShareSerializer(serializers.ModelSerializer):
             
             if shared_with == request_user:
                 raise serializers.ValidationError("You cannot share entries with yourself")
+            
+            # With entry read-only DRF no longer checks unique_together
+            entry = self.context.get('entry')
+            if entry is not None and entry.shares.filter(shared_with=shared_with).exists():
+                raise serializers.ValidationError("This entry is already shared with this user")
         
         # Validate expiration date
-        if 'expires_at' in attrs and attrs['expires_at']:
-            if attrs['expires_at'] <= timezone.now():
-                raise serializers.ValidationError("Expiration date must be in the future")
+        expires_at = attrs.get('expires_at')
+        if expires_at and expires_at <= timezone.now():
+            raise serializers.ValidationError("Expiration date must be in the future")
         
         return attrs
 
@@ -196,14 +276,13 @@ class PasswordGeneratorSerializer(serializers.Serializer):
     password = serializers.CharField(read_only=True)
     strength = serializers.DictField(read_only=True)
     
+    GENERATOR_OPTIONS = ('length', 'use_symbols', 'use_lowercase', 'use_uppercase', 'use_digits')
+    
     def generate_password(self) -> tuple[str, Dict[str, Any]]:
         """Generate password and validate strength."""
+        validated_data = self.validated_data
         password = PasswordGenerator.generate(
-            length=self.validated_data['length'],
-            use_symbols=self.validated_data['use_symbols'],
-            use_lowercase=self.validated_data['use_lowercase'],
-            use_uppercase=self.validated_data['use_uppercase'],
-            use_digits=self.validated_data['use_digits']
+            **{option: validated_data[option] for option in self.GENERATOR_OPTIONS}
         )
         
         strength = validate_password_strength(password)
@@ -211,20 +290,24 @@ class PasswordGeneratorSerializer(serializers.Serializer):
     
     def to_representation(self, instance: Any) -> Dict[str, Any]:
         """Generate password and return with strength info."""
-        password, strength = self.generate_password()
-        return {
-            'password': password,
-            'strength': strength
-        }
+        # Generate once per serializer, however often it is rendered
+        result = getattr(self, '_result', None)
+        if result is None:
+            password, strength = self.generate_password()
+            result = self._result = {
+                'password': password,
+                'strength': strength
+            }
+        return result
 
 
 class PasswordImportSerializer(serializers.Serializer):
     """Serializer for importing passwords from other managers."""
     
     file = serializers.FileField()
-    format = serializers.ChoiceField(choices=['csv', 'json', '1password'])
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS)
     merge_strategy = serializers.ChoiceField(
-        choices=['skip', 'overwrite', 'merge'],
+        choices=MERGE_STRATEGIES,
         default='skip'
     )
     
@@ -235,8 +318,13 @@ class PasswordImportSerializer(serializers.Serializer):
             raise serializers.ValidationError("File size cannot exceed 10MB")
         
         # Check file extension
-        allowed_extensions = ['.csv', '.json']
-        if not any(value.name.lower().endswith(ext) for ext in allowed_extensions):
+        if os.path.splitext(value.name)[1].lower() not in IMPORT_EXTENSIONS:
+            raise serializers.ValidationError("Only CSV and JSON files are allowed")
+        
+        # CSV and JSON are text; a NUL byte up front means a binary file
+        head = value.read(1024)
+        value.seek(0)
+        if b'\x00' in head:
             raise serializers.ValidationError("Only CSV and JSON files are allowed")
         
         return value
@@ -245,7 +333,7 @@ class PasswordImportSerializer(serializers.Serializer):
 class PasswordExportSerializer(serializers.Serializer):
     """Serializer for exporting passwords."""
     
-    format = serializers.ChoiceField(choices=['csv', 'json'])
+    format = serializers.ChoiceField(choices=EXPORT_FORMATS)
     include_passwords = serializers.BooleanField(default=True)
     categories = serializers.ListField(child=serializers.CharField(), required=False)
     date_from = serializers.DateTimeField(required=False)
@@ -270,23 +358,26 @@ class BulkPasswordOperationSerializer(serializers.Serializer):
     """Serializer for bulk operations on passwords."""
     
     entry_ids = serializers.ListField(child=serializers.IntegerField())
-    operation = serializers.ChoiceField(choices=['delete', 'move', 'tag', 'share'])
+    operation = serializers.ChoiceField(choices=BULK_OPERATIONS)
     
     # Operation-specific fields
     category = serializers.CharField(required=False)
     tags = serializers.ListField(child=serializers.CharField(), required=False)
     share_with = serializers.EmailField(required=False)
     share_type = serializers.ChoiceField(
-        choices=['view', 'edit', 'admin'],
+        choices=SHARE_TYPES,
         required=False
     )
     
     def validate_entry_ids(self, value: List[int]) -> List[int]:
         """Validate entry IDs belong to user."""
         user = self.context['request'].user
-        user_entry_ids = user.password_entries.filter(id__in=value).values_list('id', flat=True)
+        # One COUNT instead of fetching the ids; duplicates in the request
+        # must not make a valid selection look incomplete.
+        requested_ids = set(value)
+        owned_count = user.password_entries.filter(id__in=requested_ids).count()
         
-        if len(user_entry_ids) != len(value):
+        if owned_count != len(requested_ids):
             raise serializers.ValidationError("Some entries don't exist or don't belong to you")
         
         return value
@@ -1,19 +1,29 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
 from unittest.mock import patch
 import json
 import io
 import csv
+import string
+from datetime import timedelta
 from typing import Dict, Any, List
 
+from . import views
 from .models import PasswordEntry, PasswordCategory, PasswordShare, SecurityAudit
+from .serializers import PasswordCategorySerializer, PasswordEntryDetailSerializer
 from core.crypto.encryption import PasswordEncryption, PasswordGenerator, validate_password_strength
 
 User = get_user_model()
 
+# Users store their 32-byte key hex-encoded
+TEST_ENCRYPTION_KEY = b'test_key_32_bytes_long_123456789'.hex()
+
 
 class PasswordEncryptionTests(TestCase):
     """Test password encryption functionality."""
@@ -51,9 +61,9 @@ class PasswordEncryptionTests(TestCase):
         
         # Decrypt and verify
         decrypted_data = self.encryptor.decrypt_password_entry(encrypted)
-        self.assertEqual(decrypted_data['title'], data['title'])
-        self.assertEqual(decrypted_data['username'], data['username'])
-        self.assertEqual(decrypted_data['password'], data['password'])
+        for field in ('title', 'username', 'password'):
+            with self.subTest(field=field):
+                self.assertEqual(decrypted_data[field], data[field])
     
     def test_invalid_key_error(self) -> None:
         """Test error handling for invalid key."""
@@ -69,22 +79,28 @@ class PasswordEncryptionTests(TestCase):
 class PasswordGeneratorTests(TestCase):
     """Test password generation functionality."""
     
+    LOWERCASE = frozenset(string.ascii_lowercase)
+    UPPERCASE = frozenset(string.ascii_uppercase)
+    DIGITS = frozenset(string.digits)
+    SYMBOLS = frozenset(PasswordGenerator.SYMBOLS)
+    
     def test_generate_password(self) -> None:
         """Test password generation."""
         password = PasswordGenerator.generate(length=16)
+        chars = set(password)
         
         self.assertEqual(len(password), 16)
-        self.assertTrue(any(c.islower() for c in password))
-        self.assertTrue(any(c.isupper() for c in password))
-        self.assertTrue(any(c.isdigit() for c in password))
-        self.assertTrue(any(c in PasswordGenerator.SYMBOLS for c in password))
+        self.assertTrue(chars & self.LOWERCASE)
+        self.assertTrue(chars & self.UPPERCASE)
+        self.assertTrue(chars & self.DIGITS)
+        self.assertTrue(chars & self.SYMBOLS)
     
     def test_generate_password_no_symbols(self) -> None:
         """Test password generation without symbols."""
         password = PasswordGenerator.generate(length=12, use_symbols=False)
         
         self.assertEqual(len(password), 12)
-        self.assertFalse(any(c in PasswordGenerator.SYMBOLS for c in password))
+        self.assertFalse(set(password) & self.SYMBOLS)
     
     def test_generate_passphrase(self) -> None:
         """Test passphrase generation."""
@@ -109,16 +125,16 @@ class PasswordGeneratorTests(TestCase):
 class PasswordEntryModelTests(TestCase):
     """Test PasswordEntry model functionality."""
     
-    def setUp(self) -> None:
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data shared by every test in the class."""
+        # Set proper 32-byte encryption key for user in the same INSERT
+        cls.user = User.objects.create_user(
             email='test@example.com',
             username='testuser',
-            password='SecurePass123!'
+            password='SecurePass123!',
+            encryption_key=TEST_ENCRYPTION_KEY
         )
-        # Set proper 32-byte encryption key for user
-        self.user.encryption_key = 'test_key_32_bytes_long_123456789'  # 32 bytes
-        self.user.save()
     
     def test_create_password_entry(self) -> None:
         """Test creating a password entry."""
@@ -204,9 +220,10 @@ class PasswordEntryModelTests(TestCase):
 class PasswordCategoryTests(TestCase):
     """Test PasswordCategory model functionality."""
     
-    def setUp(self) -> None:
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data shared by every test in the class."""
+        cls.user = User.objects.create_user(
             email='test@example.com',
             username='testuser',
             password='SecurePass123!'
@@ -237,28 +254,132 @@ class PasswordCategoryTests(TestCase):
         self.assertIn('Finance', category_names)
         self.assertIn('Social', category_names)
         self.assertIn('Shopping', category_names)
+    
+    def test_serialize_category_list_entry_counts(self) -> None:
+        """Test categories without an entry_count annotation are counted."""
+        PasswordCategory.objects.create(user=self.user, name='Personal')
+        PasswordCategory.objects.create(user=self.user, name='Work')
+        PasswordEntry.objects.bulk_create([
+            PasswordEntry(user=self.user, title='Mail', encrypted_data='x', category='Work'),
+            PasswordEntry(user=self.user, title='VPN', encrypted_data='x', category='Work'),
+        ])
+        
+        data = PasswordCategorySerializer(
+            PasswordCategory.objects.filter(user=self.user), many=True
+        ).data
+        
+        self.assertEqual(
+            {row['name']: row['entry_count'] for row in data},
+            {'Personal': 0, 'Work': 2}
+        )
+    
+    def test_serialize_category_uses_annotation(self) -> None:
+        """Test an entry_count annotation is read without another query."""
+        category = PasswordCategory.objects.create(user=self.user, name='Work')
+        category.entry_count = 7
+        
+        with self.assertNumQueries(0):
+            data = PasswordCategorySerializer(category).data
+        self.assertEqual(data['entry_count'], 7)
+
+
+class PasswordShareTests(TestCase):
+    """Test PasswordShare status annotations."""
+    
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data shared by every test in the class."""
+        cls.owner = User.objects.create_user(
+            email='owner@example.com',
+            username='owner',
+            password='SecurePass123!'
+        )
+        cls.recipient = User.objects.create_user(
+            email='recipient@example.com',
+            username='recipient',
+            password='SecurePass123!'
+        )
+    
+    def create_share(self, title: str, **kwargs: Any) -> PasswordShare:
+        """Share a fresh entry with the recipient."""
+        entry = PasswordEntry.objects.create(user=self.owner, title=title, encrypted_data='x')
+        return PasswordShare.objects.create(
+            entry=entry, shared_by=self.owner, shared_with=self.recipient, **kwargs
+        )
+    
+    def test_with_status(self) -> None:
+        """Test the SQL status flags match the Python fallback for each case."""
+        now = timezone.now()
+        cases = {
+            'no expiry': (self.create_share('No expiry'), False, True),
+            'future expiry': (
+                self.create_share('Future', expires_at=now + timedelta(days=1)), False, True
+            ),
+            'expired': (
+                self.create_share('Expired', expires_at=now - timedelta(days=1)), True, False
+            ),
+            'inactive': (self.create_share('Inactive', is_active=False), False, False),
+            'inactive and expired': (
+                self.create_share('Both', is_active=False, expires_at=now - timedelta(days=1)),
+                True, False
+            ),
+        }
+        
+        annotated = PasswordShare.with_status(PasswordShare.objects.all()).in_bulk()
+        for label, (share, expired, valid) in cases.items():
+            with self.subTest(label):
+                row = annotated[share.pk]
+                self.assertIs(row.status_is_expired, expired)
+                self.assertIs(row.status_is_valid, valid)
+                self.assertIs(row.is_expired(), expired)
+                self.assertIs(row.is_valid(), valid)
+                # Unannotated instances compute the same answer in Python
+                self.assertIs(share.is_expired(), expired)
+                self.assertIs(share.is_valid(), valid)
 
 
 class PasswordAPITests(APITestCase):
     """Test password API endpoints."""
     
-    def setUp(self) -> None:
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    factory = APIRequestFactory()
+    
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data shared by every test in the class."""
+        # Resolve the endpoint URLs once for the whole class
+        cls.urls = {
+            'password_entries': reverse('passwords:password_entries'),
+            'generate_password': reverse('passwords:generate_password'),
+            'validate_password': reverse('passwords:validate_password'),
+            'password_categories': reverse('passwords:password_categories'),
+            'bulk_operations': reverse('passwords:bulk_operations'),
+            'security_audit': reverse('passwords:security_audit'),
+        }
+        # Set proper 32-byte encryption key for user in the same INSERT
+        cls.user = User.objects.create_user(
             email='test@example.com',
             username='testuser',
-            password='SecurePass123!'
+            password='SecurePass123!',
+            encryption_key=TEST_ENCRYPTION_KEY
         )
-        # Set proper 32-byte encryption key for user
-        self.user.encryption_key = 'test_key_32_bytes_long_123456789'  # 32 bytes
-        self.user.save()
-        
-        # Force authentication
+    
+    def setUp(self) -> None:
+        """Authenticate the test client."""
         self.client.force_authenticate(user=self.user)
     
+    def detail_url(self, pk: int) -> str:
+        """URL of a single password entry."""
+        return reverse('passwords:password_entry_detail', kwargs={'pk': pk})
+    
+    def get_view(self, view, url: str, params: Dict[str, Any]):
+        """Call a view directly, skipping URL resolution and middleware."""
+        request = self.factory.get(url, params)
+        force_authenticate(request, user=self.user)
+        return view(request)
+    
     def test_create_password_entry_api(self) -> None:
         """Test creating password entry via API."""
-        url = reverse('passwords:password_entries')
+        url = self.urls['password_entries']
         data = {
             'title': 'Test Entry',
             'username': 'testuser',
@@ -281,48 +402,84 @@ class PasswordAPITests(APITestCase):
     def test_list_password_entries_api(self) -> None:
         """Test listing password entries via API."""
         # Create test entries
-        PasswordEntry.create_entry(
-            user=self.user,
-            title='Entry 1',
-            username='user1',
-            password='Pass1!'
-        )
-        PasswordEntry.create_entry(
-            user=self.user,
-            title='Entry 2',
-            username='user2',
-            password='Pass2!'
-        )
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'Entry 1', 'username': 'user1', 'password': 'Pass1!'},
+            {'title': 'Entry 2', 'username': 'user2', 'password': 'Pass2!'},
+        ])
         
-        url = reverse('passwords:password_entries')
+        url = self.urls['password_entries']
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
     
+    def test_list_pagination_reuses_count(self) -> None:
+        """Test later pages reuse the count cached by the first page."""
+        cache.clear()
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': f'Entry {i}', 'username': 'user', 'password': 'Pass1!'}
+            for i in range(3)
+        ])
+        
+        url = self.urls['password_entries']
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        
+        PasswordEntry.create_entry(user=self.user, title='Entry 3', username='user', password='Pass1!')
+        
+        response = self.client.get(url, {'page_size': 2, 'page': 2})
+        self.assertEqual(response.data['count'], 3)
+        
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.data['count'], 4)
+    
     def test_search_password_entries_api(self) -> None:
         """Test searching password entries via API."""
         # Create test entries
-        PasswordEntry.create_entry(
-            user=self.user,
-            title='GitHub',
-            username='githubuser',
-            password='Pass1!'
-        )
-        PasswordEntry.create_entry(
-            user=self.user,
-            title='Google',
-            username='googleuser',
-            password='Pass2!'
-        )
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'GitHub', 'username': 'githubuser', 'password': 'Pass1!'},
+            {'title': 'Google', 'username': 'googleuser', 'password': 'Pass2!'},
+        ])
         
-        url = reverse('passwords:password_entries')
+        url = self.urls['password_entries']
         response = self.client.get(url, {'search': 'GitHub'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['title'], 'GitHub')
     
+    def test_filter_password_entries_by_tag_api(self) -> None:
+        """Test the ?tag= filter matches whole tags only."""
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'Work mail', 'username': 'a', 'password': 'Pass1!', 'tags': ['work', 'mail']},
+            {'title': 'Homework', 'username': 'b', 'password': 'Pass2!', 'tags': ['homework']},
+            {'title': 'Untagged', 'username': 'c', 'password': 'Pass3!'},
+        ])
+        
+        url = self.urls['password_entries']
+        response = self.client.get(url, {'tag': 'work'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['title'] for row in response.data['results']], ['Work mail'])
+        
+        response = self.client.get(url, {'tag': 'missing'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+    
+    def test_create_category_api(self) -> None:
+        """Test a new category reports the entries already filed under its name."""
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'Mail', 'username': 'a', 'password': 'Pass1!', 'category': 'Work'},
+        ])
+        
+        response = self.client.post(
+            reverse('passwords:create_category'), {'name': 'Work'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], 'Work')
+        self.assertEqual(response.data['entry_count'], 1)
+    
     def test_get_password_entry_detail_api(self) -> None:
         """Test getting password entry details via API."""
         entry = PasswordEntry.create_entry(
@@ -332,13 +489,75 @@ class PasswordAPITests(APITestCase):
             password='Secret123!'
         )
         
-        url = reverse('passwords:password_entry_detail', kwargs={'pk': entry.pk})
+        url = self.detail_url(entry.pk)
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('decrypted_password', response.data)
         self.assertEqual(response.data['decrypted_password'], 'Secret123!')
-    
+
+    def test_get_password_entry_fields_subset_api(self) -> None:
+        """Test ?fields= reveals only the requested decrypted fields."""
+        entry = PasswordEntry.create_entry(
+            user=self.user,
+            title='Test Entry',
+            username='testuser',
+            password='Secret123!'
+        )
+
+        response = self.client.get(
+            self.detail_url(entry.pk), {'fields': 'decrypted_username,decrypted_url'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['decrypted_username'], 'testuser')
+        self.assertEqual(response.data['decrypted_url'], '')
+        for name in ('decrypted_password', 'decrypted_notes', 'decrypted_custom_fields'):
+            self.assertNotIn(name, response.data)
+        # Plain fields are not filtered
+        self.assertEqual(response.data['title'], 'Test Entry')
+
+    def test_get_password_entry_unknown_fields_api(self) -> None:
+        """Test unknown ?fields= names are ignored rather than rejected."""
+        entry = PasswordEntry.create_entry(
+            user=self.user,
+            title='Test Entry',
+            username='testuser',
+            password='Secret123!'
+        )
+
+        cases = {
+            'decrypted_password,bogus': {'decrypted_password'},
+            'bogus': set(),
+        }
+        for fields, revealed in cases.items():
+            with self.subTest(fields=fields):
+                response = self.client.get(self.detail_url(entry.pk), {'fields': fields})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn('bogus', response.data)
+                self.assertEqual(
+                    revealed,
+                    set(PasswordEntryDetailSerializer.DECRYPTED_FIELDS) & set(response.data)
+                )
+
+    def test_get_password_entry_skips_unrequested_decryption_api(self) -> None:
+        """Test an entry is neither decrypted nor marked accessed without secret fields."""
+        entry = PasswordEntry.create_entry(
+            user=self.user,
+            title='Test Entry',
+            username='testuser',
+            password='Secret123!'
+        )
+
+        with patch.object(PasswordEntry, 'decrypt_data') as decrypt_data:
+            response = self.client.get(self.detail_url(entry.pk), {'fields': 'title'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Test Entry')
+        decrypt_data.assert_not_called()
+        entry.refresh_from_db()
+        self.assertIsNone(entry.last_accessed)
+
     def test_update_password_entry_api(self) -> None:
         """Test updating password entry via API."""
         entry = PasswordEntry.create_entry(
@@ -348,7 +567,7 @@ class PasswordAPITests(APITestCase):
             password='Secret123!'
         )
         
-        url = reverse('passwords:password_entry_detail', kwargs={'pk': entry.pk})
+        url = self.detail_url(entry.pk)
         data = {
             'title': 'Updated Entry',
             'username': 'newuser',
@@ -358,10 +577,13 @@ class PasswordAPITests(APITestCase):
         response = self.client.put(url, data, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        entry.refresh_from_db()
-        self.assertEqual(entry.title, 'Updated Entry')
-        self.assertEqual(entry.get_username(), 'newuser')
-        self.assertEqual(entry.get_password(), 'NewSecret456!')
+        title, blob = PasswordEntry.objects.values_list(
+            'title', 'encrypted_data'
+        ).get(pk=entry.pk)
+        data = PasswordEncryption(bytes.fromhex(TEST_ENCRYPTION_KEY)).decrypt_password_entry(blob)
+        self.assertEqual(title, 'Updated Entry')
+        self.assertEqual(data['username'], 'newuser')
+        self.assertEqual(data['password'], 'NewSecret456!')
     
     def test_delete_password_entry_api(self) -> None:
         """Test deleting password entry via API."""
@@ -372,16 +594,16 @@ class PasswordAPITests(APITestCase):
             password='Secret123!'
         )
         
-        url = reverse('passwords:password_entry_detail', kwargs={'pk': entry.pk})
+        url = self.detail_url(entry.pk)
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(PasswordEntry.objects.count(), 0)
+        self.assertFalse(PasswordEntry.objects.exists())
     
     def test_generate_password_api(self) -> None:
         """Test password generation API."""
-        url = reverse('passwords:generate_password')
-        response = self.client.get(url, {
+        url = self.urls['generate_password']
+        response = self.get_view(views.generate_password, url, {
             'length': 16,
             'use_symbols': True
         })
@@ -393,44 +615,50 @@ class PasswordAPITests(APITestCase):
     
     def test_validate_password_api(self) -> None:
         """Test password validation API."""
-        url = reverse('passwords:validate_password')
-        
-        # Strong password
-        response = self.client.get(url, {'password': 'StrongP@ssw0rd123!'})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(response.data['score'], 4)
+        url = self.urls['validate_password']
+        cases = [
+            ('StrongP@ssw0rd123!', self.assertGreaterEqual, 4),  # Strong password
+            ('123456', self.assertLess, 3),  # Weak password
+        ]
         
-        # Weak password
-        response = self.client.get(url, {'password': '123456'})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertLess(response.data['score'], 3)
+        for password, check, score in cases:
+            with self.subTest(password=password):
+                response = self.get_view(views.validate_password, url, {'password': password})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                check(response.data['score'], score)
     
     def test_password_categories_api(self) -> None:
         """Test password categories API."""
-        url = reverse('passwords:password_categories')
+        url = self.urls['password_categories']
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Should return default categories
         self.assertGreater(len(response.data), 0)
     
+    def test_password_categories_query_count(self) -> None:
+        """Test listing categories costs one query however many there are."""
+        PasswordCategory.get_default_categories(self.user)
+        PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'Mail', 'username': 'a', 'password': 'Pass1!', 'category': 'Work'},
+        ])
+        url = self.urls['password_categories']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, ['Finance', 'Personal', 'Shopping', 'Social', 'Work'])
+    
     def test_bulk_operations_api(self) -> None:
         """Test bulk operations API."""
         # Create test entries
-        entry1 = PasswordEntry.create_entry(
-            user=self.user,
-            title='Entry 1',
-            username='user1',
-            password='Pass1!'
-        )
-        entry2 = PasswordEntry.create_entry(
-            user=self.user,
-            title='Entry 2',
-            username='user2',
-            password='Pass2!'
-        )
+        entry1, entry2 = PasswordEntry.bulk_create_entries(self.user, [
+            {'title': 'Entry 1', 'username': 'user1', 'password': 'Pass1!'},
+            {'title': 'Entry 2', 'username': 'user2', 'password': 'Pass2!'},
+        ])
         
-        url = reverse('passwords:bulk_operations')
+        url = self.urls['bulk_operations']
         
         # Test bulk delete
         data = {
@@ -441,7 +669,7 @@ class PasswordAPITests(APITestCase):
         response = self.client.post(url, data, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(PasswordEntry.objects.count(), 0)
+        self.assertFalse(PasswordEntry.objects.exists())
     
     def test_security_audit_api(self) -> None:
         """Test security audit API."""
@@ -461,7 +689,7 @@ class PasswordAPITests(APITestCase):
             details={'title': 'Test Entry'}
         )
         
-        url = reverse('passwords:security_audit')
+        url = self.urls['security_audit']
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -471,18 +699,24 @@ class PasswordAPITests(APITestCase):
 class PasswordImportExportTests(APITestCase):
     """Test password import/export functionality."""
     
-    def setUp(self) -> None:
-        """Set up test data."""
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data shared by every test in the class."""
+        # Resolve the endpoint URLs once for the whole class
+        cls.urls = {
+            'export_passwords': reverse('passwords:export_passwords'),
+            'import_passwords': reverse('passwords:import_passwords'),
+        }
+        # Set proper 32-byte encryption key for user in the same INSERT
+        cls.user = User.objects.create_user(
             email='test@example.com',
             username='testuser',
-            password='SecurePass123!'
+            password='SecurePass123!',
+            encryption_key=TEST_ENCRYPTION_KEY
         )
-        # Set proper 32-byte encryption key for user
-        self.user.encryption_key = 'test_key_32_bytes_long_123456789'  # 32 bytes
-        self.user.save()
-        
-        # Force authentication
+    
+    def setUp(self) -> None:
+        """Authenticate the test client."""
         self.client.force_authenticate(user=self.user)
     
     def test_export_csv_api(self) -> None:
@@ -497,7 +731,7 @@ class PasswordImportExportTests(APITestCase):
             notes='Test notes'
         )
         
-        url = reverse('passwords:export_passwords')
+        url = self.urls['export_passwords']
         response = self.client.get(url, {
             'format': 'csv',
             'include_passwords': 'true'
@@ -517,7 +751,7 @@ class PasswordImportExportTests(APITestCase):
             password='Secret123!'
         )
         
-        url = reverse('passwords:export_passwords')
+        url = self.urls['export_passwords']
         response = self.client.get(url, {
             'format': 'json',
             'include_passwords': 'true'
@@ -527,17 +761,61 @@ class PasswordImportExportTests(APITestCase):
         self.assertEqual(response['Content-Type'], 'application/json')
         self.assertIn('attachment; filename="passwords.json"', response['Content-Disposition'])
     
+    def test_export_audit_logged_before_streaming(self) -> None:
+        """Test the export audit exists before the stream and gets the count at its end."""
+        PasswordEntry.create_entry(
+            user=self.user,
+            title='Test Entry',
+            username='testuser',
+            password='Secret123!'
+        )
+        
+        response = self.client.get(self.urls['export_passwords'], {'format': 'json'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        audit = SecurityAudit.objects.get(user=self.user, event_type='export')
+        self.assertEqual(audit.details, {'format': 'json', 'status': 'started'})
+        
+        exported = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(exported), 1)
+        audit.refresh_from_db()
+        self.assertEqual(audit.details, {'format': 'json', 'status': 'completed', 'count': 1})
+
+    def test_export_shares_user_encryptor(self) -> None:
+        """Test an export builds the user's cipher once, not once per entry."""
+        for i in range(3):
+            PasswordEntry.create_entry(
+                user=self.user,
+                title=f'Entry {i}',
+                username='testuser',
+                password='Secret123!'
+            )
+        # A fresh instance, without the cipher create_entry cached on self.user
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+
+        with patch('apps.passwords.models.PasswordEncryption', wraps=PasswordEncryption) as cipher:
+            response = self.client.get(self.urls['export_passwords'], {'format': 'json'})
+            exported = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual(len(exported), 3)
+        self.assertEqual(cipher.call_count, 1)
+
     def test_import_csv_api(self) -> None:
         """Test CSV import API."""
-        # Create CSV file
-        csv_content = """title,username,password,url,notes,category
-Test Entry,testuser,Secret123!,https://example.com,Test notes,Personal
-Another Entry,anotheruser,Another456!,https://test.com,Another notes,Work"""
-        
-        csv_file = io.StringIO(csv_content)
-        csv_file.name = 'test.csv'
+        # Create CSV file, written straight into the upload's bytes
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+        csv.writer(text).writerows([
+            ['title', 'username', 'password', 'url', 'notes', 'category'],
+            ['Test Entry', 'testuser', 'Secret123!', 'https://example.com', 'Test notes', 'Personal'],
+            ['Another Entry', 'anotheruser', 'Another456!', 'https://test.com', 'Another notes', 'Work'],
+        ])
+        
+        csv_file = SimpleUploadedFile(
+            'test.csv', buffer.getvalue(), content_type='text/csv'
+        )
         
-        url = reverse('passwords:import_passwords')
+        url = self.urls['import_passwords']
         response = self.client.post(url, {
             'file': csv_file,
             'format': 'csv',
@@ -563,10 +841,12 @@ Another Entry,anotheruser,Another456!,https://test.com,Another notes,Work"""
             }
         ]
         
-        json_file = io.StringIO(json.dumps(json_content))
-        json_file.name = 'test.json'
+        json_file = SimpleUploadedFile(
+            'test.json', json.dumps(json_content).encode('utf-8'),
+            content_type='application/json'
+        )
         
-        url = reverse('passwords:import_passwords')
+        url = self.urls['import_passwords']
         response = self.client.post(url, {
             'file': json_file,
             'format': 'json',
@@ -577,3 +857,71 @@ Another Entry,anotheruser,Another456!,https://test.com,Another notes,Work"""
         self.assertIn('count', response.data)
         self.assertEqual(response.data['count'], 1)
         self.assertEqual(PasswordEntry.objects.count(), 1)
+    
+    def import_json(self, items: List[Dict[str, Any]], merge_strategy: str) -> Dict[str, Any]:
+        """Run the JSON importer directly on a list of items."""
+        file = io.BytesIO(json.dumps(items).encode('utf-8'))
+        return views._import_json(file, self.user, merge_strategy)
+    
+    def test_import_skip_duplicate_titles(self) -> None:
+        """Test skip ignores titles that exist already or earlier in the file."""
+        PasswordEntry.create_entry(
+            user=self.user, title='Existing', username='old', password='Old123!'
+        )
+        
+        result = self.import_json([
+            {'title': 'Existing', 'username': 'new', 'password': 'New123!'},
+            {'title': 'New', 'username': 'first', 'password': 'First123!'},
+            {'title': 'New', 'username': 'second', 'password': 'Second123!'},
+        ], 'skip')
+        
+        self.assertEqual(result, {'imported': 1, 'skipped': 2, 'errors': []})
+        self.assertEqual(PasswordEntry.objects.filter(user=self.user).count(), 2)
+        existing = PasswordEntry.objects.get(user=self.user, title='Existing')
+        self.assertEqual(existing.decrypt_data()['username'], 'old')
+        new = PasswordEntry.objects.get(user=self.user, title='New')
+        self.assertEqual(new.decrypt_data()['username'], 'first')
+    
+    def test_import_overwrite_duplicate_titles(self) -> None:
+        """Test overwrite lets the last row with a title win, for existing and new entries."""
+        existing = PasswordEntry.create_entry(
+            user=self.user, title='Existing', username='old', password='Old123!'
+        )
+        
+        result = self.import_json([
+            {'title': 'Existing', 'username': 'first', 'password': 'First123!'},
+            {'title': 'New', 'username': 'first', 'password': 'First123!'},
+            {'title': 'New', 'username': 'second', 'password': 'Second123!'},
+            {'title': 'Existing', 'username': 'second', 'password': 'Second123!'},
+        ], 'overwrite')
+        
+        self.assertEqual(result, {'imported': 4, 'skipped': 0, 'errors': []})
+        self.assertEqual(PasswordEntry.objects.filter(user=self.user).count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.decrypt_data()['username'], 'second')
+        self.assertEqual(existing.decrypt_data()['password'], 'Second123!')
+        new = PasswordEntry.objects.get(user=self.user, title='New')
+        self.assertEqual(new.decrypt_data()['username'], 'second')
+    
+    def test_import_failed_row_does_not_fail_batch(self) -> None:
+        """Test a row that fails to save is reported alone and the others are kept."""
+        bulk_create_entries = PasswordEntry.bulk_create_entries
+        
+        def fail_on_broken(user, rows, **kwargs):
+            if any(row['title'] == 'Broken' for row in rows):
+                raise ValueError('cannot save')
+            return bulk_create_entries(user, rows, **kwargs)
+        
+        with patch.object(PasswordEntry, 'bulk_create_entries', side_effect=fail_on_broken):
+            result = self.import_json([
+                {'title': 'First', 'username': 'a', 'password': 'First123!'},
+                {'title': 'Broken', 'username': 'b', 'password': 'Broken123!'},
+                {'title': 'Third', 'username': 'c', 'password': 'Third123!'},
+            ], 'skip')
+        
+        self.assertEqual(result['imported'], 2)
+        self.assertEqual(result['errors'], ['Item 2: cannot save'])
+        self.assertEqual(
+            set(PasswordEntry.objects.filter(user=self.user).values_list('title', flat=True)),
+            {'First', 'Third'}
+        )
@@ -1,18 +1,26 @@
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.pagination import PageNumberPagination
+from django.db import connection, transaction
 from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.db.models.expressions import RawSQL
+from django.http import JsonResponse, StreamingHttpResponse
+import codecs
 import csv
+import functools
+import hashlib
 import json
 import io
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from .models import PasswordEntry, PasswordCategory, PasswordShare, SecurityAudit
 from .serializers import (
@@ -20,17 +28,69 @@ from .serializers import (
     PasswordCategorySerializer, PasswordShareSerializer,
     PasswordGeneratorSerializer, PasswordImportSerializer,
     PasswordExportSerializer, SecurityAuditSerializer,
-    BulkPasswordOperationSerializer
+    BulkPasswordOperationSerializer, ENTRY_LIST_FIELDS, serialize_entry_rows
 )
-from core.crypto.encryption import PasswordGenerator, validate_password_strength
+from core.crypto.encryption import PasswordEncryption, PasswordGenerator, validate_password_strength
 from core.crypto.exceptions import EncryptionError, DecryptionError
 
 
+# Entries fetched per database round trip while streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
+# Columns the entry list may be sorted by
+ENTRY_SORT_FIELDS = frozenset({'title', 'created_at', 'updated_at', 'last_accessed'})
+
+# Seconds a list's total row count is reused while paging past page 1
+PAGE_COUNT_CACHE_TIMEOUT = 60
+
+
+def _tag_filter(tag: str) -> Q:
+    """Match entries whose tags list includes tag exactly."""
+    if connection.features.supports_json_field_contains:
+        # jsonb @> on PostgreSQL, served by the tags GIN index
+        return Q(tags__contains=[tag])
+    # SQLite has no JSON containment lookup; compare the array's elements
+    return Q(pk__in=RawSQL(
+        'SELECT password_entries.id FROM password_entries, json_each(password_entries.tags) '
+        'WHERE json_each.value = %s',
+        (tag,)
+    ))
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose COUNT(*) is read from the cache when a key is set."""
+    count_cache_key = None
+    refresh_count = True
+    
+    @cached_property
+    def count(self) -> int:
+        if self.count_cache_key is None:
+            return super().count
+        
+        count = None if self.refresh_count else cache.get(self.count_cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_cache_key, count, PAGE_COUNT_CACHE_TIMEOUT)
+        return count
+
+
 class PasswordPagination(PageNumberPagination):
     """Custom pagination for password entries."""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    
+    def django_paginator_class(self, object_list, per_page) -> CachedCountPaginator:
+        paginator = CachedCountPaginator(object_list, per_page)
+        # Counts are per user and per filter, i.e. per SQL statement
+        sql = str(object_list.query).encode()
+        paginator.count_cache_key = 'page_count:{}:{}'.format(
+            self.request.user.pk, hashlib.md5(sql, usedforsecurity=False).hexdigest()
+        )
+        # The first page always recounts, so the total catches up with
+        # entries added or removed since the count was cached
+        paginator.refresh_count = self.request.query_params.get(self.page_query_param, '1') == '1'
+        return paginator
 
 
 @api_view(['GET', 'POST'])
@@ -40,8 +100,8 @@ def password_entries(request: Request) -> Response:
     user = request.user
     
     if request.method == 'GET':
-        # Filter and search
-        queryset = PasswordEntry.objects.filter(user=user)
+        # Filter and search; list rows are plain columns, never the ciphertext
+        queryset = PasswordEntry.objects.filter(user=user).values(*ENTRY_LIST_FIELDS)
         
         # Search
         search = request.GET.get('search', '')
@@ -50,7 +110,7 @@ def password_entries(request: Request) -> Response:
                 Q(title__icontains=search) |
                 Q(username_hint__icontains=search) |
                 Q(url_hint__icontains=search) |
-                Q(tags__contains=[search])
+                _tag_filter(search)
             )
         
         # Category filter
@@ -58,6 +118,11 @@ def password_entries(request: Request) -> Response:
         if category:
             queryset = queryset.filter(category=category)
         
+        # Tag filter
+        tag = request.GET.get('tag', '')
+        if tag:
+            queryset = queryset.filter(_tag_filter(tag))
+        
         # Favorites filter
         favorites_only = request.GET.get('favorites', 'false').lower() == 'true'
         if favorites_only:
@@ -66,7 +131,7 @@ def password_entries(request: Request) -> Response:
         # Sort
         sort_by = request.GET.get('sort', 'title')
         sort_order = request.GET.get('order', 'asc')
-        if sort_by in ['title', 'created_at', 'updated_at', 'last_accessed']:
+        if sort_by in ENTRY_SORT_FIELDS:
             if sort_order == 'desc':
                 sort_by = f'-{sort_by}'
             queryset = queryset.order_by(sort_by)
@@ -75,8 +140,7 @@ def password_entries(request: Request) -> Response:
         paginator = PasswordPagination()
         page = paginator.paginate_queryset(queryset, request)
         
-        serializer = PasswordEntrySerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return paginator.get_paginated_response(serialize_entry_rows(page))
     
     elif request.method == 'POST':
         serializer = PasswordEntrySerializer(data=request.data, context={'request': request})
@@ -106,7 +170,7 @@ def password_entry_detail(request: Request, pk: int) -> Response:
     entry = get_object_or_404(PasswordEntry, pk=pk, user=user)
     
     if request.method == 'GET':
-        serializer = PasswordEntryDetailSerializer(entry)
+        serializer = PasswordEntryDetailSerializer(entry, context={'request': request})
         return Response(serializer.data)
     
     elif request.method == 'PUT':
@@ -152,13 +216,18 @@ def password_categories(request: Request) -> Response:
     """List password categories."""
     user = request.user
 
-    # Get default categories if none exist
-    if not user.password_categories.exists():
-        PasswordCategory.get_default_categories(user)
-
-    categories = PasswordCategory.objects.filter(user=user).order_by('name')
     # Return only category names as a simple string array
-    category_names = [cat.name for cat in categories]
+    category_names = list(
+        PasswordCategory.objects.filter(user=user).order_by('name').values_list('name', flat=True)
+    )
+
+    # Get default categories if none exist; an empty list is the only case
+    # that needs a second query
+    if not category_names:
+        category_names = sorted(
+            category.name for category in PasswordCategory.get_default_categories(user)
+        )
+
     return Response(category_names)
 
 
@@ -216,7 +285,9 @@ def share_password(request: Request, pk: int) -> Response:
     user = request.user
     entry = get_object_or_404(PasswordEntry, pk=pk, user=user)
     
-    serializer = PasswordShareSerializer(data=request.data, context={'request': request})
+    serializer = PasswordShareSerializer(
+        data=request.data, context={'request': request, 'entry': entry}
+    )
     
     if serializer.is_valid():
         share = serializer.save(entry=entry, shared_by=user)
@@ -245,15 +316,14 @@ def shared_with_me(request: Request) -> Response:
     """List passwords shared with the current user."""
     user = request.user
     
-    shares = PasswordShare.objects.filter(
+    # Expired shares are filtered out in SQL rather than after loading them
+    shares = PasswordShare.with_status(PasswordShare.objects.filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()),
         shared_with=user,
         is_active=True
-    ).select_related('entry', 'shared_by')
+    ).select_related('entry', 'shared_by', 'shared_with'))
     
-    # Filter out expired shares
-    valid_shares = [share for share in shares if share.is_valid()]
-    
-    serializer = PasswordShareSerializer(valid_shares, many=True)
+    serializer = PasswordShareSerializer(shares, many=True)
     return Response(serializer.data)
 
 
@@ -263,9 +333,9 @@ def shared_by_me(request: Request) -> Response:
     """List passwords shared by the current user."""
     user = request.user
     
-    shares = PasswordShare.objects.filter(
+    shares = PasswordShare.with_status(PasswordShare.objects.filter(
         shared_by=user
-    ).select_related('entry', 'shared_with')
+    ).select_related('entry', 'shared_by', 'shared_with'))
     
     serializer = PasswordShareSerializer(shares, many=True)
     return Response(serializer.data)
@@ -286,18 +356,22 @@ def bulk_operations(request: Request) -> Response:
     entries = PasswordEntry.objects.filter(user=user, id__in=entry_ids)
     
     if operation == 'delete':
-        titles = [entry.title for entry in entries]
+        titles = list(entries.values_list('title', flat=True))
         entries.delete()
         
-        # Log bulk deletion
-        for title in titles:
-            SecurityAudit.log_event(
+        # Log bulk deletion, one audit row per entry in a single INSERT
+        ip_address = get_client_ip(request)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        SecurityAudit.objects.bulk_create([
+            SecurityAudit(
                 user=user,
                 event_type='delete',
-                ip_address=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                ip_address=ip_address,
+                user_agent=user_agent,
                 details={'title': title}
             )
+            for title in titles
+        ])
         
         return Response({'message': f'Deleted {len(titles)} entries'})
     
@@ -308,10 +382,14 @@ def bulk_operations(request: Request) -> Response:
     
     elif operation == 'tag':
         tags = serializer.validated_data['tags']
-        for entry in entries:
-            current_tags = entry.tags
-            entry.tags = list(set(current_tags + tags))
-            entry.save()
+        # Only tags changes; bulk_update writes every entry in one statement
+        # but, unlike save(), leaves auto_now alone
+        now = timezone.now()
+        updated = list(entries.only('id', 'tags'))
+        for entry in updated:
+            entry.tags = list(frozenset(entry.tags).union(tags))
+            entry.updated_at = now
+        PasswordEntry.objects.bulk_update(updated, ['tags', 'updated_at'], batch_size=500)
         return Response({'message': f'Added tags to {len(entry_ids)} entries'})
     
     elif operation == 'share':
@@ -331,7 +409,8 @@ def security_audit(request: Request) -> Response:
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    audits = SecurityAudit.objects.filter(user=user)
+    # The serializer reads entry.title and user.email for every row
+    audits = SecurityAudit.objects.filter(user=user).select_related('user', 'entry')
     
     if date_from:
         audits = audits.filter(timestamp__gte=date_from)
@@ -407,7 +486,8 @@ def export_passwords(request: Request) -> Response:
     date_from = serializer.validated_data.get('date_from')
     date_to = serializer.validated_data.get('date_to')
     
-    # Filter entries
+    # Filter entries; the export loop attaches request.user to each row so
+    # the key and cipher cached on it are built once for the whole export
     entries = PasswordEntry.objects.filter(user=user)
     
     if categories:
@@ -417,46 +497,116 @@ def export_passwords(request: Request) -> Response:
     if date_to:
         entries = entries.filter(created_at__lte=date_to)
     
+    if export_format == 'csv':
+        export = _export_csv
+    elif export_format == 'json':
+        export = _export_json
+    else:
+        return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Record the export before any data leaves the server; the stream
+    # fills in the count when it ends
+    audit = SecurityAudit.log_event(
+        user=user,
+        event_type='export',
+        ip_address=get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        details={'format': export_format, 'status': 'started'}
+    )
+    
+    def finish_export(count: int, completed: bool) -> None:
+        audit.details = {
+            'format': export_format,
+            'status': 'completed' if completed else 'interrupted',
+            'count': count,
+        }
+        audit.save(update_fields=['details'])
+    
+    return export(entries, user, include_passwords, finish_export)
+
+
+def _parse_tags(value: Optional[str]) -> List[str]:
+    """Split a comma-separated CSV tags cell, dropping blanks around and between tags."""
+    if not value:
+        return []
+    return [tag for tag in (part.strip() for part in value.split(',')) if tag]
+
+
+def _existing_entries_by_title(user, merge_strategy: str) -> Dict[str, Any]:
+    """Map the user's titles to what an import row with that title runs into."""
+    entries = PasswordEntry.objects.filter(user=user)
+    if merge_strategy == 'skip':
+        # Only whether the title exists matters
+        return dict.fromkeys(entries.values_list('title', flat=True), True)
+    if merge_strategy != 'overwrite':
+        return {}
+    
+    existing = {}
+    # Default ordering, so duplicate titles resolve to the entry .first() gave
+    for entry in entries:
+        entry.user = user
+        existing.setdefault(entry.title, entry)
+    return existing
+
+
+def _write_imported_entries(write: Callable[[List[Any]], Any], entries: List[Any],
+                            row_numbers: List[List[int]], label: str) -> Tuple[int, List[str]]:
+    """
+    Write imported entries in one batch, returning the rows written and errors.
+    
+    A failed batch is rolled back and retried one entry at a time, so only
+    the failing rows are skipped and each is reported by its row number.
+    """
+    if not entries:
+        return 0, []
     try:
-        if export_format == 'csv':
-            response = _export_csv(entries, include_passwords)
-        elif export_format == 'json':
-            response = _export_json(entries, include_passwords)
-        else:
-            return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Log export
-        SecurityAudit.log_event(
-            user=user,
-            event_type='export',
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-            details={'format': export_format, 'count': entries.count()}
-        )
-        
-        return response
-        
-    except Exception as e:
-        return Response({'error': f'Export failed: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            write(entries)
+        return sum(len(rows) for rows in row_numbers), []
+    except Exception:
+        # Find the rows that fail below
+        pass
+    
+    written = 0
+    errors = []
+    for entry, rows in zip(entries, row_numbers):
+        try:
+            with transaction.atomic():
+                write([entry])
+            written += len(rows)
+        except Exception as e:
+            errors.append(f"{label} {rows[-1]}: {str(e)}")
+    return written, errors
 
 
 def _import_csv(file, user, merge_strategy: str) -> Dict[str, Any]:
     """Import passwords from CSV file."""
-    decoded_file = file.read().decode('utf-8').splitlines()
-    reader = csv.DictReader(decoded_file)
+    # Decode line by line as the reader consumes them instead of holding a
+    # decoded copy of the whole upload; utf-8-sig drops a leading BOM.
+    reader = csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
 
     imported_count = 0
     skipped_count = 0
     errors = []
-
-    for row in reader:
+    # Existing entries are looked up once; new and overwritten ones are
+    # written in bulk after the loop
+    existing_by_title = _existing_entries_by_title(user, merge_strategy)
+    encryptor = PasswordEncryption(bytes.fromhex(user.encryption_key))
+    updated = {}
+    # Source row numbers behind each written entry, for error messages
+    updated_row_numbers = {}
+    pending = []
+    pending_row_numbers = []
+    pending_by_title = {}
+
+    for row_number, row in enumerate(reader, start=1):
         try:
-            # Check if entry already exists
-            existing = PasswordEntry.objects.filter(
-                user=user, title=row.get('title', '')
-            ).first()
+            # Check if entry already exists, or was added earlier in this file
+            title = row.get('title', '')
+            earlier = pending_by_title.get(title)
+            existing = None if earlier is not None else existing_by_title.get(title)
 
-            if existing and merge_strategy == 'skip':
+            if (existing or earlier is not None) and merge_strategy == 'skip':
                 skipped_count += 1
                 continue
 
@@ -498,7 +648,7 @@ def _import_csv(file, user, merge_strategy: str) -> Dict[str, Any]:
                 'url': row.get('url', ''),
                 'notes': notes,
                 'category': row.get('category', ''),
-                'tags': row.get('tags', '').split(',') if row.get('tags') else [],
+                'tags': _parse_tags(row.get('tags')),
                 'username2': row.get('username2'),
                 'username3': row.get('username3'),
                 'otp_url': row.get('otpUrl'),
@@ -508,15 +658,35 @@ def _import_csv(file, user, merge_strategy: str) -> Dict[str, Any]:
             }
 
             if existing and merge_strategy == 'overwrite':
-                existing.update_from_data(password_data)
+                existing.apply_data(password_data, encryptor)
+                updated[existing.pk] = existing
+                updated_row_numbers.setdefault(existing.pk, []).append(row_number)
+            elif earlier is not None and merge_strategy == 'overwrite':
+                pending[earlier] = password_data
+                pending_row_numbers[earlier].append(row_number)
             else:
-                PasswordEntry.create_entry(user, **password_data)
-
-            imported_count += 1
+                pending_by_title.setdefault(title, len(pending))
+                pending.append(password_data)
+                pending_row_numbers.append([row_number])
 
         except Exception as e:
             # Skip invalid rows and log error
-            errors.append(f"Row {imported_count + skipped_count + len(errors) + 1}: {str(e)}")
+            errors.append(f"Row {row_number}: {str(e)}")
+
+    # Overwritten entries first, then new ones
+    written, write_errors = _write_imported_entries(
+        PasswordEntry.bulk_update_entries, list(updated.values()),
+        [updated_row_numbers[pk] for pk in updated], 'Row'
+    )
+    imported_count += written
+    errors.extend(write_errors)
+
+    written, write_errors = _write_imported_entries(
+        functools.partial(PasswordEntry.bulk_create_entries, user), pending,
+        pending_row_numbers, 'Row'
+    )
+    imported_count += written
+    errors.extend(write_errors)
 
     return {
         'imported': imported_count,
@@ -527,7 +697,8 @@ def _import_csv(file, user, merge_strategy: str) -> Dict[str, Any]:
 
 def _import_json(file, user, merge_strategy: str) -> Dict[str, Any]:
     """Import passwords from JSON file."""
-    data = json.loads(file.read().decode('utf-8'))
+    # json.loads detects the encoding of raw bytes; no decoded copy needed
+    data = json.loads(file.read())
 
     if not isinstance(data, list):
         data = [data]
@@ -535,15 +706,25 @@ def _import_json(file, user, merge_strategy: str) -> Dict[str, Any]:
     imported_count = 0
     skipped_count = 0
     errors = []
-
-    for item in data:
+    # Existing entries are looked up once; new and overwritten ones are
+    # written in bulk after the loop
+    existing_by_title = _existing_entries_by_title(user, merge_strategy)
+    encryptor = PasswordEncryption(bytes.fromhex(user.encryption_key))
+    updated = {}
+    # Source row numbers behind each written entry, for error messages
+    updated_row_numbers = {}
+    pending = []
+    pending_row_numbers = []
+    pending_by_title = {}
+
+    for row_number, item in enumerate(data, start=1):
         try:
-            # Check if entry already exists
-            existing = PasswordEntry.objects.filter(
-                user=user, title=item.get('title', '')
-            ).first()
+            # Check if entry already exists, or was added earlier in this file
+            title = item.get('title', '')
+            earlier = pending_by_title.get(title)
+            existing = None if earlier is not None else existing_by_title.get(title)
 
-            if existing and merge_strategy == 'skip':
+            if (existing or earlier is not None) and merge_strategy == 'skip':
                 skipped_count += 1
                 continue
 
@@ -595,15 +776,35 @@ def _import_json(file, user, merge_strategy: str) -> Dict[str, Any]:
             }
 
             if existing and merge_strategy == 'overwrite':
-                existing.update_from_data(password_data)
+                existing.apply_data(password_data, encryptor)
+                updated[existing.pk] = existing
+                updated_row_numbers.setdefault(existing.pk, []).append(row_number)
+            elif earlier is not None and merge_strategy == 'overwrite':
+                pending[earlier] = password_data
+                pending_row_numbers[earlier].append(row_number)
             else:
-                PasswordEntry.create_entry(user, **password_data)
-
-            imported_count += 1
+                pending_by_title.setdefault(title, len(pending))
+                pending.append(password_data)
+                pending_row_numbers.append([row_number])
 
         except Exception as e:
             # Skip invalid items and log error
-            errors.append(f"Item {imported_count + skipped_count + len(errors) + 1}: {str(e)}")
+            errors.append(f"Item {row_number}: {str(e)}")
+
+    # Overwritten entries first, then new ones
+    written, write_errors = _write_imported_entries(
+        PasswordEntry.bulk_update_entries, list(updated.values()),
+        [updated_row_numbers[pk] for pk in updated], 'Item'
+    )
+    imported_count += written
+    errors.extend(write_errors)
+
+    written, write_errors = _write_imported_entries(
+        functools.partial(PasswordEntry.bulk_create_entries, user), pending,
+        pending_row_numbers, 'Item'
+    )
+    imported_count += written
+    errors.extend(write_errors)
 
     return {
         'imported': imported_count,
@@ -612,80 +813,113 @@ def _import_json(file, user, merge_strategy: str) -> Dict[str, Any]:
     }
 
 
-def _export_csv(entries, include_passwords: bool) -> Response:
-    """Export passwords to CSV format."""
-    output = io.StringIO()
-    writer = csv.writer(output)
-
+def _export_csv(entries, user, include_passwords: bool,
+                on_finish: Callable[[int, bool], None]) -> StreamingHttpResponse:
+    """Export passwords to CSV format; on_finish gets the count and whether the stream completed."""
     # Header
     headers = ['title', 'username', 'url', 'notes', 'category', 'tags', 'created_at', 'source', 'source_id']
     if include_passwords:
         headers.insert(2, 'password')
-    writer.writerow(headers)
 
-    # Data rows
-    for entry in entries:
+    def generate_rows():
+        # Stream row by row; only one iterator chunk of entries is in memory
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(headers)
+        exported = 0
+        completed = False
+
         try:
-            data = entry.decrypt_data()
-            row = [
-                data.get('title', ''),
-                data.get('username', ''),
-                data.get('url', ''),
-                data.get('notes', ''),
-                entry.category,
-                ','.join(entry.tags),
-                entry.created_at.isoformat(),
-                entry.source,
-                entry.source_id
-            ]
-
-            if include_passwords:
-                row.insert(2, data.get('password', ''))
-
-            writer.writerow(row)
-
-        except Exception:
-            # Skip entries that can't be decrypted
-            continue
-
-    response = Response(output.getvalue())
-    response['Content-Type'] = 'text/csv'
+            # Data rows
+            for entry in entries.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                entry.user = user
+                try:
+                    data = entry.decrypt_data()
+                    row = [
+                        data.get('title', ''),
+                        data.get('username', ''),
+                        data.get('url', ''),
+                        data.get('notes', ''),
+                        entry.category,
+                        ','.join(entry.tags),
+                        entry.created_at.isoformat(),
+                        entry.source,
+                        entry.source_id
+                    ]
+
+                    if include_passwords:
+                        row.insert(2, data.get('password', ''))
+
+                    writer.writerow(row)
+
+                except Exception:
+                    # Skip entries that can't be decrypted
+                    continue
+
+                exported += 1
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+
+            yield output.getvalue()
+            completed = True
+        finally:
+            # Also runs when the client disconnects mid-stream
+            on_finish(exported, completed)
+
+    response = StreamingHttpResponse(generate_rows(), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="passwords.csv"'
     return response
 
 
-def _export_json(entries, include_passwords: bool) -> Response:
-    """Export passwords to JSON format."""
-    export_data = []
+def _export_json(entries, user, include_passwords: bool,
+                 on_finish: Callable[[int, bool], None]) -> StreamingHttpResponse:
+    """Export passwords to JSON format; on_finish gets the count and whether the stream completed."""
 
-    for entry in entries:
-        try:
-            data = entry.decrypt_data()
-            entry_data = {
-                'title': data.get('title', ''),
-                'username': data.get('username', ''),
-                'url': data.get('url', ''),
-                'notes': data.get('notes', ''),
-                'category': entry.category,
-                'tags': entry.tags,
-                'created_at': entry.created_at.isoformat(),
-                'updated_at': entry.updated_at.isoformat(),
-                'custom_fields': data.get('custom_fields', {}),
-                'source': entry.source,
-                'source_id': entry.source_id
-            }
-
-            if include_passwords:
-                entry_data['password'] = data.get('password', '')
+    def generate_items():
+        # Stream a compact JSON array item by item; indenting would roughly
+        # double the payload
+        separator = '['
+        exported = 0
+        completed = False
 
-            export_data.append(entry_data)
-
-        except Exception:
-            # Skip entries that can't be decrypted
-            continue
-
-    response = Response(json.dumps(export_data, indent=2))
-    response['Content-Type'] = 'application/json'
+        try:
+            for entry in entries.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                entry.user = user
+                try:
+                    data = entry.decrypt_data()
+                    entry_data = {
+                        'title': data.get('title', ''),
+                        'username': data.get('username', ''),
+                        'url': data.get('url', ''),
+                        'notes': data.get('notes', ''),
+                        'category': entry.category,
+                        'tags': entry.tags,
+                        'created_at': entry.created_at.isoformat(),
+                        'updated_at': entry.updated_at.isoformat(),
+                        'custom_fields': data.get('custom_fields', {}),
+                        'source': entry.source,
+                        'source_id': entry.source_id
+                    }
+
+                    if include_passwords:
+                        entry_data['password'] = data.get('password', '')
+
+                except Exception:
+                    # Skip entries that can't be decrypted
+                    continue
+
+                exported += 1
+                yield separator + json.dumps(entry_data, separators=(',', ':'))
+                separator = ','
+
+            yield '[]' if separator == '[' else ']'
+            completed = True
+        finally:
+            # Also runs when the client disconnects mid-stream
+            on_finish(exported, completed)
+
+    response = StreamingHttpResponse(generate_items(), content_type='application/json')
     response['Content-Disposition'] = 'attachment; filename="passwords.json"'
     return response
 
@@ -694,7 +928,8 @@ def get_client_ip(request: Request) -> str:
     """Get client IP address from request."""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        # Only the first hop matters; partition stops at the first comma
+        ip = x_forwarded_for.partition(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
     
@@ -1,7 +1,7 @@
 """
 Django settings for config project.
 
-Uses modular settings structure with base.py and test.py
+Test runs use config.settings.test, which overrides these settings.
 """
 
 from pathlib import Path
@@ -9,7 +9,7 @@ import environ
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 # Environment variables
 env = environ.Env()
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.authentication.middleware.SecurityLogBufferMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -82,6 +83,17 @@ DATABASES = {
     )
 }
 
+# Cache
+# Shared by every worker process, so evicting a cached user (see
+# apps.authentication.authentication) takes effect everywhere.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env('REDIS_URL', default='redis://localhost:6379/0'),
+    }
+}
+
 
 # Custom User Model
 AUTH_USER_MODEL = 'authentication.User'
@@ -138,7 +150,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -180,6 +192,13 @@ else:
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Master password KDF (scrypt) cost; benchmark on the target hardware before raising
+MASTER_PASSWORD_SCRYPT = {
+    'n': env.int('MASTER_PASSWORD_SCRYPT_N', default=2 ** 14),
+    'r': env.int('MASTER_PASSWORD_SCRYPT_R', default=8),
+    'p': env.int('MASTER_PASSWORD_SCRYPT_P', default=1),
+}
+
 # Security settings
 SECURE_SSL_REDIRECT = env.bool('SECURE_SSL_REDIRECT', default=False)
 SECURE_HSTS_SECONDS = env.int('SECURE_HSTS_SECONDS', default=0)
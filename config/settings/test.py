@@ -1,31 +1,58 @@
 """
 Test settings for password manager project.
 
-Overrides base settings for testing environment.
+Overrides config.settings for the test runners.
 """
 
-from .base import *  # noqa: F401,F403
+from . import *  # noqa: F401,F403
 
 # Override for testing
 DEBUG = True
 
-# Use in-memory database for tests
+# File-backed test database inside the checkout, so separate checkouts
+# never share one; pytest-django adds a suffix per xdist worker. Pass
+# --reuse-db locally to keep the migrated schema between runs.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
+        'NAME': BASE_DIR / 'db.sqlite3',  # noqa: F405
+        'TEST': {
+            'NAME': BASE_DIR / 'test_password_manager.sqlite3',  # noqa: F405
+        },
+    }
+}
+
+# In-process cache, so tests need no Redis server
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
-# Disable migrations for faster tests
-class DisableMigrations:
-    def __contains__(self, item):
-        return True
-    
-    def __getitem__(self, item):
-        return None
+# Middleware the test client doesn't need: it never crosses origins, skips
+# CSRF checks and reads no security headers
+MIDDLEWARE = [
+    name for name in MIDDLEWARE  # noqa: F405
+    if name not in {
+        "corsheaders.middleware.CorsMiddleware",
+        "django.middleware.security.SecurityMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    }
+]
 
-MIGRATION_MODULES = DisableMigrations()
+# DRF: JSON responses only, and tests send only JSON and multipart bodies
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+}
 
 # Password hashing for faster tests
 PASSWORD_HASHERS = [
@@ -19,7 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("api/auth/", include('apps.authentication.urls')),
     path("api/passwords/", include('apps.passwords.urls')),
+    path("api/auth/", include('apps.authentication.urls')),
+    path("admin/", admin.site.urls),
 ]
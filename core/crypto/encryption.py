@@ -6,13 +6,11 @@ with proper key derivation and random nonce generation.
 """
 
 import os
-import hashlib
-import secrets
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.backends import default_backend
-from typing import Tuple, Optional, Union
+from typing import List, Tuple, Optional, Union
 import base64
 import json
 
@@ -33,7 +31,8 @@ class PasswordEncryption:
             raise EncryptionError("Master key must be 32 bytes")
         
         self.master_key = master_key
-        self.backend = default_backend()
+        # One AES-GCM context per key, reused by every encrypt/decrypt call
+        self._aesgcm = AESGCM(master_key)
     
     @classmethod
     def derive_key_from_password(cls, password: str, salt: bytes, iterations: int = 100000) -> bytes:
@@ -52,8 +51,7 @@ class PasswordEncryption:
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=iterations,
-            backend=default_backend()
+            iterations=iterations
         )
         return kdf.derive(password.encode('utf-8'))
     
@@ -72,6 +70,19 @@ class PasswordEncryption:
         Returns:
             Base64-encoded encrypted data (nonce + ciphertext + tag)
             
+        Raises:
+            EncryptionError: If encryption fails
+        """
+        try:
+            data = plaintext.encode('utf-8')
+        except (AttributeError, UnicodeEncodeError) as e:
+            raise EncryptionError(f"Encryption failed: {e}") from e
+        return self.encrypt_bytes(data)
+    
+    def encrypt_bytes(self, data: bytes) -> str:
+        """
+        Encrypt raw bytes using AES-256-GCM; same output format as encrypt().
+        
         Raises:
             EncryptionError: If encryption fails
         """
@@ -79,11 +90,8 @@ class PasswordEncryption:
             # Generate random nonce (12 bytes for GCM)
             nonce = os.urandom(12)
             
-            # Initialize AES-GCM cipher
-            aesgcm = AESGCM(self.master_key)
-            
             # Encrypt data
-            ciphertext = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), None)
+            ciphertext = self._aesgcm.encrypt(nonce, data, None)
             
             # Combine nonce and ciphertext
             encrypted_data = nonce + ciphertext
@@ -91,8 +99,31 @@ class PasswordEncryption:
             # Return base64-encoded result
             return base64.b64encode(encrypted_data).decode('utf-8')
             
-        except Exception as e:
-            raise EncryptionError(f"Encryption failed: {str(e)}")
+        except (TypeError, ValueError, OverflowError) as e:
+            raise EncryptionError(f"Encryption failed: {e}") from e
+    
+    def encrypt_many(self, plaintexts: List[str]) -> List[str]:
+        """
+        Encrypt several plaintexts, same output format as encrypt().
+        
+        All nonces come from a single os.urandom call; each plaintext still
+        gets its own fresh 12-byte slice.
+        
+        Raises:
+            EncryptionError: If encryption fails
+        """
+        try:
+            nonces = os.urandom(12 * len(plaintexts))
+            aesgcm = self._aesgcm
+            encrypted = []
+            for offset, plaintext in zip(range(0, len(nonces), 12), plaintexts):
+                nonce = nonces[offset:offset + 12]
+                ciphertext = aesgcm.encrypt(nonce, plaintext.encode('utf-8'), None)
+                encrypted.append(base64.b64encode(nonce + ciphertext).decode('utf-8'))
+            return encrypted
+            
+        except (AttributeError, TypeError, ValueError, OverflowError) as e:
+            raise EncryptionError(f"Encryption failed: {e}") from e
     
     def decrypt(self, encrypted_b64: str) -> str:
         """
@@ -104,27 +135,38 @@ class PasswordEncryption:
         Returns:
             Decrypted plaintext
             
+        Raises:
+            DecryptionError: If decryption fails
+        """
+        plaintext = self.decrypt_bytes(encrypted_b64)
+        try:
+            return plaintext.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise DecryptionError(f"Decryption failed: {e}") from e
+    
+    def decrypt_bytes(self, encrypted_b64: str) -> bytes:
+        """
+        Decrypt data produced by encrypt() or encrypt_bytes() to raw bytes.
+        
         Raises:
             DecryptionError: If decryption fails
         """
         try:
             # Decode base64
-            encrypted_data = base64.b64decode(encrypted_b64.encode('utf-8'))
+            encrypted_data = base64.b64decode(encrypted_b64)
             
             # Extract nonce (first 12 bytes)
             nonce = encrypted_data[:12]
             ciphertext = encrypted_data[12:]
             
-            # Initialize AES-GCM cipher
-            aesgcm = AESGCM(self.master_key)
-            
             # Decrypt data
-            plaintext = aesgcm.decrypt(nonce, ciphertext, None)
-            
-            return plaintext.decode('utf-8')
+            return self._aesgcm.decrypt(nonce, ciphertext, None)
             
-        except Exception as e:
-            raise DecryptionError(f"Decryption failed: {str(e)}")
+        except InvalidTag:
+            # Wrong key or tampered data; InvalidTag carries no message
+            raise DecryptionError("Decryption failed: authentication failed") from None
+        except (TypeError, ValueError) as e:
+            raise DecryptionError(f"Decryption failed: {e}") from e
     
     def encrypt_password_entry(self, title: str, username: str, password: str,
                               url: Optional[str] = None, notes: Optional[str] = None,
@@ -147,6 +189,28 @@ class PasswordEncryption:
         Returns:
             Base64-encoded encrypted entry
         """
+        return self.encrypt(self._entry_json(
+            title, username, password, url, notes, username2, username3, otp_url, custom_fields
+        ))
+    
+    def encrypt_password_entries(self, entries: List[dict]) -> List[str]:
+        """
+        Encrypt many password entries in one call.
+        
+        Args:
+            entries: Keyword arguments of encrypt_password_entry, one dict per entry
+            
+        Returns:
+            Base64-encoded encrypted entries, in input order
+        """
+        return self.encrypt_many([self._entry_json(**entry) for entry in entries])
+    
+    @staticmethod
+    def _entry_json(title: str, username: str, password: str,
+                    url: Optional[str] = None, notes: Optional[str] = None,
+                    username2: Optional[str] = None, username3: Optional[str] = None,
+                    otp_url: Optional[str] = None, custom_fields: Optional[dict] = None) -> str:
+        """Serialize an entry to the JSON that gets encrypted."""
         entry_data = {
             'title': title,
             'username': username,
@@ -156,12 +220,14 @@ class PasswordEncryption:
             'username2': username2,
             'username3': username3,
             'otp_url': otp_url,
-            'custom_fields': custom_fields or {},
-            'created_at': secrets.token_hex(16)  # Unique identifier
+            'custom_fields': custom_fields or {}
         }
 
-        json_data = json.dumps(entry_data, separators=(',', ':'))
-        return self.encrypt(json_data)
+        # Unset optional fields are left out; readers look fields up with .get()
+        return json.dumps(
+            {key: value for key, value in entry_data.items() if value is not None},
+            separators=(',', ':')
+        )
     
     def decrypt_password_entry(self, encrypted_entry: str) -> dict:
         """
@@ -205,7 +271,7 @@ class KeyManager:
         
         # Encrypt master key with derived key
         encryptor = PasswordEncryption(derived_key)
-        return encryptor.encrypt(master_key.hex())
+        return encryptor.encrypt_bytes(master_key)
     
     def decrypt_master_key(self, encrypted_key: str, password: str, salt: bytes) -> bytes:
         """
@@ -224,9 +290,12 @@ class KeyManager:
         
         # Decrypt master key
         decryptor = PasswordEncryption(derived_key)
-        master_key_hex = decryptor.decrypt(encrypted_key)
+        master_key = decryptor.decrypt_bytes(encrypted_key)
         
-        return bytes.fromhex(master_key_hex)
+        # Keys wrapped before raw-byte wrapping hold the 64-char hex form
+        if len(master_key) == 64:
+            return bytes.fromhex(master_key.decode('ascii'))
+        return master_key
 
 
 class PasswordGenerator:
@@ -271,20 +340,42 @@ class PasswordGenerator:
         if not charset:
             raise ValueError("At least one character type must be selected")
         
-        # Generate password
-        password = ''.join(secrets.choice(charset) for _ in range(length))
-        
-        # Ensure password contains at least one character from each selected type
-        if use_lowercase and not any(c in cls.LOWERCASE for c in password):
-            password = cls.LOWERCASE[0] + password[:-1]
-        if use_uppercase and not any(c in cls.UPPERCASE for c in password):
-            password = cls.UPPERCASE[0] + password[:-1]
-        if use_digits and not any(c in cls.DIGITS for c in password):
-            password = cls.DIGITS[0] + password[:-1]
-        if use_symbols and not any(c in cls.SYMBOLS for c in password):
-            password = cls.SYMBOLS[0] + password[:-1]
+        required = [
+            frozenset(chars) for chars, used in (
+                (cls.LOWERCASE, use_lowercase),
+                (cls.UPPERCASE, use_uppercase),
+                (cls.DIGITS, use_digits),
+                (cls.SYMBOLS, use_symbols),
+            ) if used
+        ]
         
-        return password
+        # Redraw until every selected type is present; patching in fixed
+        # characters would make the result partly predictable.
+        while True:
+            password = cls._random_chars(charset, length)
+            chars = set(password)
+            if all(not group.isdisjoint(chars) for group in required):
+                return password
+    
+    @classmethod
+    def _random_chars(cls, charset: str, count: int) -> str:
+        """Pick count characters uniformly from charset using batched urandom draws."""
+        return ''.join(cls._random_picks(charset, count))
+    
+    @staticmethod
+    def _random_picks(population, count: int) -> list:
+        """Pick count items uniformly from a sequence of at most 256 items using batched urandom draws."""
+        size = len(population)
+        # Bytes at or above limit would bias the modulo and are rejected
+        limit = 256 - 256 % size
+        picked = []
+        while len(picked) < count:
+            picked.extend(
+                population[byte % size]
+                for byte in os.urandom(2 * (count - len(picked)))
+                if byte < limit
+            )
+        return picked[:count]
     
     @classmethod
     def generate_passphrase(cls, word_count: int = 4, separator: str = '-', 
@@ -308,7 +399,7 @@ class PasswordGenerator:
             'sunset', 'tiger', 'umbrella', 'valley', 'window', 'yellow'
         ]
         
-        selected_words = [secrets.choice(words) for _ in range(word_count)]
+        selected_words = cls._random_picks(words, word_count)
         
         if capitalize:
             selected_words = [word.capitalize() for word in selected_words]
@@ -316,6 +407,24 @@ class PasswordGenerator:
         return separator.join(selected_words)
 
 
+# Lookup tables for validate_password_strength, built once at import
+COMMON_PASSWORDS = frozenset(['password', '123456', 'qwerty', 'admin'])
+LOWERCASE_CHARS = frozenset(PasswordGenerator.LOWERCASE)
+UPPERCASE_CHARS = frozenset(PasswordGenerator.UPPERCASE)
+DIGIT_CHARS = frozenset(PasswordGenerator.DIGITS)
+SYMBOL_CHARS = frozenset(PasswordGenerator.SYMBOLS)
+
+STRENGTH_LEVELS = {
+    0: 'Very Weak',
+    1: 'Weak',
+    2: 'Fair',
+    3: 'Good',
+    4: 'Strong',
+    5: 'Very Strong',
+    6: 'Excellent'
+}
+
+
 def validate_password_strength(password: str) -> dict:
     """
     Validate password strength and return feedback.
@@ -337,44 +446,45 @@ def validate_password_strength(password: str) -> dict:
     else:
         feedback.append("Password should be at least 8 characters long")
     
-    # Character variety
-    if any(c.islower() for c in password):
+    # Character variety; each class is checked over distinct characters only
+    chars = set(password)
+    if password.isascii():
+        # ASCII classes are fixed sets, so the checks stay in C
+        has_lower = not LOWERCASE_CHARS.isdisjoint(chars)
+        has_upper = not UPPERCASE_CHARS.isdisjoint(chars)
+        has_digit = not DIGIT_CHARS.isdisjoint(chars)
+    else:
+        has_lower = any(c.islower() for c in chars)
+        has_upper = any(c.isupper() for c in chars)
+        has_digit = any(c.isdigit() for c in chars)
+    
+    if has_lower:
         score += 1
     else:
         feedback.append("Include lowercase letters")
     
-    if any(c.isupper() for c in password):
+    if has_upper:
         score += 1
     else:
         feedback.append("Include uppercase letters")
     
-    if any(c.isdigit() for c in password):
+    if has_digit:
         score += 1
     else:
         feedback.append("Include numbers")
     
-    if any(c in PasswordGenerator.SYMBOLS for c in password):
+    if not SYMBOL_CHARS.isdisjoint(chars):
         score += 1
     else:
         feedback.append("Include symbols")
     
     # Common patterns
-    if password.lower() in ['password', '123456', 'qwerty', 'admin']:
+    if password.lower() in COMMON_PASSWORDS:
         score = 0
         feedback.append("Avoid common passwords")
     
-    strength_levels = {
-        0: 'Very Weak',
-        1: 'Weak',
-        2: 'Fair',
-        3: 'Good',
-        4: 'Strong',
-        5: 'Very Strong',
-        6: 'Excellent'
-    }
-    
     return {
         'score': score,
-        'strength': strength_levels.get(score, 'Unknown'),
+        'strength': STRENGTH_LEVELS.get(score, 'Unknown'),
         'feedback': feedback
     }